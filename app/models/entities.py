@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.models.database import Base
@@ -27,7 +27,20 @@ class Resume(Base):
     skills = Column(Text, nullable=True)
     total_experience_years = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Bumped whenever the parsed content changes; incremental matching compares it to Match.created_at
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     s3_url = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the uploaded file
+    parser = Column(String(20), nullable=True)
+    # pending -> parsing -> uploading -> indexing -> ready | failed (see app.utils.ingest)
+    status = Column(String(20), nullable=False, default="ready", index=True)
+    error = Column(Text, nullable=True)
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_model = Column(String(255), nullable=True)
+    skill_list = Column(JSON, nullable=True)
+    sentences = Column(JSON, nullable=True)
+    sentence_embeddings = Column(LargeBinary, nullable=True)
+    features_version = Column(String(255), nullable=True)
     matches = relationship("Match", back_populates="resume", cascade="all, delete-orphan")
 
 
@@ -41,11 +54,21 @@ class JobDescription(Base):
     skills = Column(Text)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc)) 
     file_url = Column(String(512), nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the file (or text)
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_model = Column(String(255), nullable=True)
+    skill_list = Column(JSON, nullable=True)
+    features_version = Column(String(255), nullable=True)
     matches = relationship("Match", back_populates="job_description", cascade="all, delete-orphan")
 
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        # One row per (resume, JD): bulk reruns upsert in place (see app.utils.match_store)
+        UniqueConstraint("resume_id", "job_description_id", name="uq_matches_resume_jd"),
+        Index("ix_matches_jd_score", "job_description_id", "score"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False)
@@ -56,6 +79,34 @@ class Match(Base):
     explanations = Column(Text)         
     resume_s3_url = Column(String, nullable=True)
     jd_s3_url = Column(String, nullable=True)
+    scorer_version = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     resume = relationship("Resume", back_populates="matches")
-    job_description = relationship("JobDescription", back_populates="matches")
\ No newline at end of file
+    job_description = relationship("JobDescription", back_populates="matches")
+
+class MatchJob(Base):
+    """A background bulk-matching run of one JD against every ready resume (see app.utils.match_jobs)."""
+
+    __tablename__ = "match_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_description_id = Column(Integer, ForeignKey("job_descriptions.id", ondelete="CASCADE"), nullable=False)
+    # queued -> running -> completed | failed | cancelled
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    include_explanations = Column(Boolean, nullable=False, default=True)
+    force = Column(Boolean, nullable=False, default=False)
+    top_k = Column(Integer, nullable=False, default=100)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    total_resumes = Column(Integer, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    rescored = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    # Keyset cursor: every resume with id <= last_resume_id is committed, so a restart resumes after it
+    last_resume_id = Column(Integer, nullable=False, default=0)
+    top_results = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Heartbeat: bumped with every committed batch
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
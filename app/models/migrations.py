@@ -0,0 +1,88 @@
+"""
+In-place schema upgrades for databases created before the current models.
+
+``create_all`` only creates missing tables; it never alters existing ones. ``upgrade_schema``
+inspects the live tables and adds what they lack: every model column (NOT NULL ones with
+their scalar default, so existing rows stay valid), the model indexes, and the
+one-row-per-(resume, JD) constraint on matches after deleting duplicate rows (the newest,
+highest id, is kept). Each step is skipped when already applied, so it is safe to run on
+every startup.
+"""
+from sqlalchemy import inspect, literal, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models import entities  # noqa: F401  (registers the tables on Base)
+from app.models.database import Base
+
+MATCHES_UNIQUE_NAME = "uq_matches_resume_jd"
+# Taken for the whole upgrade on PostgreSQL so several workers starting at once run it one at a time
+_PG_LOCK_KEY = 7_315_002
+
+
+def _default_sql(column, conn: Connection) -> str:
+    default = column.default
+    if default is None or not default.is_scalar:
+        return ""
+    value = literal(default.arg, column.type).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    return f" DEFAULT {value}"
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+            default = _default_sql(column, conn)
+            if not column.nullable and default:
+                ddl += default + " NOT NULL"
+            print(f"Schema upgrade: adding {table.name}.{column.name}")
+            conn.execute(text(ddl))
+            if table.name == "resumes" and column.name == "updated_at":
+                # Existing resumes have not changed since they were created
+                conn.execute(text("UPDATE resumes SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+def _add_matches_unique(conn: Connection) -> None:
+    inspector = inspect(conn)
+    if "matches" not in inspector.get_table_names():
+        return
+    names = {c["name"] for c in inspector.get_unique_constraints("matches")}
+    names |= {i["name"] for i in inspector.get_indexes("matches") if i.get("unique")}
+    if MATCHES_UNIQUE_NAME in names:
+        return
+    deleted = conn.execute(
+        text(
+            "DELETE FROM matches WHERE id NOT IN "
+            "(SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM matches GROUP BY resume_id, job_description_id) AS newest)"
+        )
+    ).rowcount
+    print(f"Schema upgrade: removed {deleted} duplicate match rows, adding {MATCHES_UNIQUE_NAME}")
+    if conn.dialect.name == "sqlite":  # no ALTER TABLE ... ADD CONSTRAINT; a unique index serves ON CONFLICT
+        conn.execute(text(f"CREATE UNIQUE INDEX {MATCHES_UNIQUE_NAME} ON matches (resume_id, job_description_id)"))
+    else:
+        conn.execute(
+            text(f"ALTER TABLE matches ADD CONSTRAINT {MATCHES_UNIQUE_NAME} UNIQUE (resume_id, job_description_id)")
+        )
+
+
+def _add_missing_indexes(conn: Connection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:  # index=True columns included
+            index.create(bind=conn, checkfirst=True)
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Create missing tables, then bring existing ones up to the models. Idempotent."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+        Base.metadata.create_all(bind=conn)
+        _add_missing_columns(conn)
+        _add_matches_unique(conn)
+        _add_missing_indexes(conn)
@@ -37,7 +37,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+    # Sync on purpose: FastAPI runs it on its threadpool, keeping the user query off the event loop
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -84,7 +85,7 @@ def signup(email: str, password: str, db: Session = Depends(get_db)):
     return {"message": "HR account created successfully."}
 
 @router.post("/login", response_model=TokenResponse)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == form_data.username).first()
     if not user or not verify_password(form_data.password, user.password_hash):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
@@ -93,7 +94,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 
 
 @router.post("/seed_hr")
-async def seed_hr(db: Session = Depends(get_db)):
+def seed_hr(db: Session = Depends(get_db)):
     # Convenience endpoint for local dev to create an HR user
     existing = db.query(User).filter(User.email == "hr@example.com").first()
     if existing:
@@ -1,7 +1,34 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.utils.embeddings import get_embedding_batcher, get_embedding_cache
+from app.utils.startup import STARTUP_PHASES, get_startup
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness_check():
+    """200 once the startup phases (database, workers, model warm-up) are done, else 503."""
+    startup = get_startup()
+    state = startup.state(STARTUP_PHASES)
+    if not state["ready"]:
+        startup.start(STARTUP_PHASES)  # retries from a failed phase; no-op while running
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
+@router.get("/health/embeddings")
+async def embedding_batcher_stats():
+    """Micro-batching queue depth and batch-size distribution for the embedding model."""
+    return get_embedding_batcher().stats()
+
+
+@router.get("/health/embeddings/cache")
+async def embedding_cache_stats():
+    """Hit ratio of the text-embedding cache (memory and shared disk tiers)."""
+    cache = get_embedding_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
@@ -1,3 +1,5 @@
+import asyncio
+import hashlib
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import Optional
@@ -6,14 +8,42 @@ from io import BytesIO
 from app.models.database import get_db
 from app.models.entities import JobDescription
 from app.routes.auth import hr_required
-from app.utils.parsers import extract_text
-from app.utils.nlp import extract_skills
+from app.utils.concurrency import run_sync
+from app.utils.parsers import extract_text_in_pool
+from app.utils.features import ensure_document_embedding, ensure_jd_skills
 from app.utils.s3_client import upload_resume as upload_to_s3  
 from app.schemas.jd import JobDescriptionResponse
 
 router = APIRouter()
 
 
+def _find_duplicate(db: Session, content_hash: str) -> Optional[JobDescription]:
+    return (
+        db.query(JobDescription)
+        .filter(JobDescription.content_hash == content_hash)
+        .order_by(JobDescription.id)
+        .first()
+    )
+
+
+def _save_job_description(db: Session, jd: JobDescription, deduplicated: bool) -> JobDescriptionResponse:
+    skills = ensure_jd_skills(jd)
+    jd.skills = ", ".join(skills) if skills else None
+    ensure_document_embedding(jd)
+
+    db.add(jd)
+    db.commit()
+    db.refresh(jd)
+
+    return JobDescriptionResponse(
+        job_description_id=jd.id,
+        title=jd.title,
+        skills=skills,
+        file_url=jd.file_url,
+        deduplicated=deduplicated,
+    )
+
+
 @router.post("/job_description", response_model=JobDescriptionResponse)
 async def create_job_description(
     title: Optional[str] = Form(None),
@@ -29,16 +59,28 @@ async def create_job_description(
     - Plain text or JSON input
     - File uploads (PDF, DOCX, TXT)
     Automatically extracts text, skills, uploads JD file to S3/job_descriptions/.
+    A file or text seen before reuses the stored extraction and embedding (deduplicated=true).
     """
 
     extracted_text = None
     s3_url = None
+    content_hash = None
+    duplicate = None
 
-    # --- If JD file uploaded ---
+    # --- If JD file uploaded (a file seen before skips parsing and the S3 upload) ---
     if jd_file:
         try:
             file_bytes = await jd_file.read()
-            extracted_text, used_fmt = extract_text(jd_file.filename, jd_file.content_type, file_bytes)
+            content_hash = hashlib.sha256(file_bytes).hexdigest()
+            duplicate = await run_sync(_find_duplicate, db, content_hash)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error processing JD file: {str(e)}")
+
+    if jd_file and duplicate is None:
+        try:
+            extracted_text, used_fmt = await asyncio.to_thread(
+                extract_text_in_pool, jd_file.filename, jd_file.content_type or "", file_bytes
+            )
             if not extracted_text.strip():
                 raise HTTPException(status_code=400, detail=f"Failed to extract text from {jd_file.filename}")
 
@@ -55,27 +97,34 @@ async def create_job_description(
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error processing JD file: {str(e)}")
 
-    # --- Validate input ---
-    if not description_text or not description_text.strip():
-        raise HTTPException(status_code=400, detail="Job description text or file is required")
-
-    skills = extract_skills(description_text)
+    # --- Plain-text JD: dedup on the text itself ---
+    if duplicate is None and not jd_file and description_text and description_text.strip():
+        content_hash = hashlib.sha256(description_text.encode()).hexdigest()
+        duplicate = await run_sync(_find_duplicate, db, content_hash)
 
     # --- Save to database ---
-    jd = JobDescription(
-        title=title or "Untitled JD",
-        description_text=description_text,
-        skills=", ".join(skills) if skills else None,
-        file_url=s3_url
-    )
+    if duplicate is not None:
+        # Reuse the extracted text, skills and embedding; only the title is new
+        jd = JobDescription(
+            title=title or "Untitled JD",
+            description_text=duplicate.description_text,
+            file_url=duplicate.file_url,
+            content_hash=content_hash,
+            skills=duplicate.skills,
+            skill_list=duplicate.skill_list,
+            features_version=duplicate.features_version,
+            embedding=duplicate.embedding,
+            embedding_model=duplicate.embedding_model,
+        )
+    else:
+        # --- Validate input ---
+        if not description_text or not description_text.strip():
+            raise HTTPException(status_code=400, detail="Job description text or file is required")
 
-    db.add(jd)
-    db.commit()
-    db.refresh(jd)
-
-    return JobDescriptionResponse(
-        job_description_id=jd.id,
-        title=jd.title,
-        skills=skills,
-        file_url=s3_url,
-    )
+        jd = JobDescription(
+            title=title or "Untitled JD",
+            description_text=description_text,
+            file_url=s3_url,
+            content_hash=content_hash,
+        )
+    return await run_sync(_save_job_description, db, jd, duplicate is not None)
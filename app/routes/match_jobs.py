@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.models.database import get_db
+from app.models.entities import JobDescription, MatchJob
+from app.routes.auth import hr_required
+from app.utils.concurrency import run_sync
+from app.utils.match_jobs import FINISHED_STATUSES, create_match_job, job_progress, request_cancel
+from app.schemas.resume import BulkResultItem, MatchJobResponse
+
+router = APIRouter()
+
+
+def _job_response(job: MatchJob, limit: int) -> MatchJobResponse:
+    percent, eta = job_progress(job)
+    return MatchJobResponse(
+        job_id=job.id,
+        job_description_id=job.job_description_id,
+        status=job.status,
+        include_explanations=job.include_explanations,
+        total_resumes=job.total_resumes,
+        processed=job.processed,
+        resumes_rescored=job.rescored,
+        progress_percent=percent,
+        eta_seconds=eta,
+        average_score=round(job.score_sum / job.processed, 2) if job.processed else None,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        results=[BulkResultItem(**item) for item in (job.top_results or [])[:limit]],
+    )
+
+
+def _get_job(db: Session, job_id: int) -> MatchJob:
+    job = db.query(MatchJob).filter(MatchJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Match job not found")
+    return job
+
+
+def _create_bulk_match_job(
+    db: Session, job_description_id: int, top_k: int, include_explanations: bool, force: bool
+) -> MatchJobResponse:
+    jd = db.query(JobDescription).filter(JobDescription.id == job_description_id).first()
+    if not jd:
+        raise HTTPException(status_code=404, detail="Job description not found")
+
+    job = create_match_job(db, jd.id, include_explanations, force, top_k)
+    return _job_response(job, limit=0)
+
+
+@router.post("/results/jobs", response_model=MatchJobResponse, status_code=202)
+async def create_bulk_match_job(
+    job_description_id: int,
+    top_k: int = Query(100, ge=1, le=1000, description="Number of best results the job keeps"),
+    include_explanations: bool = Query(True, description="Set false to skip sentence-level explanations for a faster ranking"),
+    force: bool = Query(False, description="Rescore every resume instead of reusing stored matches"),
+    _: dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """
+    Start a background /results/bulk run and return its job id immediately.
+
+    Poll GET /results/jobs/{job_id} for progress, ETA and the best results so far.
+    """
+    return await run_sync(_create_bulk_match_job, db, job_description_id, top_k, include_explanations, force)
+
+
+def _get_bulk_match_job(db: Session, job_id: int, limit: int) -> MatchJobResponse:
+    return _job_response(_get_job(db, job_id), limit)
+
+
+@router.get("/results/jobs/{job_id}", response_model=MatchJobResponse)
+async def get_bulk_match_job(
+    job_id: int,
+    limit: int = Query(20, ge=0, le=1000, description="Number of top results to include"),
+    _: dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """Progress of a matching job with its best results so far (partial until completed)."""
+    return await run_sync(_get_bulk_match_job, db, job_id, limit)
+
+
+def _cancel_bulk_match_job(db: Session, job_id: int) -> MatchJobResponse:
+    job = _get_job(db, job_id)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Match job already {job.status}")
+    request_cancel(db, job)
+    db.refresh(job)
+    return _job_response(job, limit=0)
+
+
+@router.post("/results/jobs/{job_id}/cancel", response_model=MatchJobResponse)
+async def cancel_bulk_match_job(
+    job_id: int,
+    _: dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """Cancel a job; a running job stops after the batch in progress (its matches are kept)."""
+    return await run_sync(_cancel_bulk_match_job, db, job_id)
@@ -0,0 +1,65 @@
+import time
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from app.utils.embedding_store import get_resume_embedding_store
+from app.utils.embeddings import get_embedding_batcher, get_embedding_cache
+from app.utils.metrics import REQUEST_SECONDS, register_collector, render_metrics
+from app.utils.skill_vectors import get_skill_vector_cache
+
+router = APIRouter()
+
+
+def _hit_ratio(hits: int, misses: int) -> float:
+    return round(hits / (hits + misses), 4) if hits + misses else 0.0
+
+
+def _cache_and_queue_metrics():
+    cache = get_embedding_cache()
+    if cache is not None:
+        stats = cache.stats()
+        yield "embedding_cache_lookups_total", "counter", "Text embedding cache lookups by result.", {
+            'result="memory_hit"': stats["memory_hits"],
+            'result="disk_hit"': stats["disk_hits"],
+            'result="miss"': stats["misses"],
+        }
+        yield "embedding_cache_hit_ratio", "gauge", "Share of text embedding lookups served from cache.", {
+            "": stats["hit_ratio"]
+        }
+
+    skills = get_skill_vector_cache()
+    yield "skill_vector_cache_hit_ratio", "gauge", "Share of out-of-vocabulary skill lookups served from cache.", {
+        "": _hit_ratio(skills.hits, skills.misses)
+    }
+
+    batcher = get_embedding_batcher().stats()
+    yield "embed_queue_depth", "gauge", "Texts waiting for the embedding micro-batcher.", {
+        "": batcher["queue_depth_texts"]
+    }
+    yield "embed_batch_mean_size", "gauge", "Mean texts per micro-batch.", {"": batcher["mean_batch_size"]}
+
+    store = get_resume_embedding_store().stats()
+    yield "embedding_store_rows", "gauge", "Rows in the shared resume embedding store.", {
+        'state="live"': store["live_rows"],
+        'state="dead"': store["dead_rows"],
+    }
+
+
+register_collector(_cache_and_queue_metrics)
+
+
+async def record_request_metrics(request: Request, call_next):
+    """HTTP middleware: handler latency per route template (unmatched paths share one series)."""
+    started = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(getattr(route, "path", "unmatched"), time.perf_counter() - started)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of this worker process's metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,36 +1,81 @@
+import heapq
+import json
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, defer
 
-from app.models.database import get_db
-from app.models.entities import JobDescription, Resume, Match
+from app.models.database import SessionLocal, get_db
+from app.models.entities import JobDescription, Resume
 from app.routes.auth import hr_required
-from app.utils.scoring import score_resume_against_jd
-from app.schemas.resume import ResultsResponse, BulkResultsResponse, BulkResultItem
+from app.utils.concurrency import BULK_TIMEOUT_SECONDS, run_sync
+from app.utils.bulk_matching import (
+    DEFERRED_RESUME_COLUMNS,
+    iter_ready_resumes,
+    result_item,
+    resume_skills,
+    resume_vectors,
+    score_incrementally,
+)
+from app.utils.scoring import match_skills, score_resume_against_jd
+from app.utils.embeddings import similarity_matrix_0_100, similarity_to_score_0_100
+from app.utils.features import (
+    ensure_document_embedding,
+    ensure_document_embeddings,
+    ensure_jd_skills,
+    ensure_resume_features,
+)
+from app.utils.ingest import STATUS_FAILED, STATUS_READY
+from app.utils.match_store import upsert_matches
+from app.utils.vector_index import ResumeVectorIndex, get_resume_index
+from app.schemas.resume import (
+    ResultsResponse,
+    BulkResultsResponse,
+    BulkResultItem,
+    MatrixBestFit,
+    MatrixJobRanking,
+    MatrixRankedResume,
+    MatrixResultsRequest,
+    MatrixResultsResponse,
+    MatrixResumeBestFit,
+    ShortlistItem,
+    ShortlistResponse,
+)
 
 router = APIRouter()
 
 
-@router.post("/results", response_model=ResultsResponse)
-async def match_resume_to_jd(
-    resume_id: int = Query(..., description="ID of the resume to evaluate"),
-    job_description_id: int = Query(..., description="ID of the job description to compare against"),
-    _: dict = Depends(hr_required),
-    db: Session = Depends(get_db),
-):
-    
-
+def _match_resume_to_jd(db: Session, resume_id: int, job_description_id: int) -> ResultsResponse:
     # --- Validate resume existence ---
     resume = db.query(Resume).filter(Resume.id == resume_id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
+    if resume.status != STATUS_READY:
+        raise HTTPException(status_code=409, detail=f"Resume is not ready (status: {resume.status})")
 
     # --- Validate JD existence ---
     jd = db.query(JobDescription).filter(JobDescription.id == job_description_id).first()
     if not jd:
         raise HTTPException(status_code=404, detail="Job description not found")
 
-    # --- Perform scoring ---
-    result = score_resume_against_jd(resume.text_content, jd.description_text)
+    # --- Perform scoring (stored vectors; backfilled once if missing or stale) ---
+    resume_vec = ensure_document_embedding(resume)
+    jd_vec = ensure_document_embedding(jd)
+    features = ensure_resume_features([resume])[0]
+    jd_skills = ensure_jd_skills(jd)
+    db.commit()
+    result = score_resume_against_jd(
+        resume.text_content,
+        jd.description_text,
+        resume_vec,
+        jd_vec,
+        resume_skills=features.skills,
+        jd_skills=jd_skills,
+        resume_sentences=features.sentences,
+        resume_sentence_vecs=features.sentence_vecs,
+    )
 
     return ResultsResponse(
         resume_id=resume.id,
@@ -42,61 +87,422 @@ async def match_resume_to_jd(
         s3_url=resume.s3_url,
     )
 
-@router.get("/results/bulk", response_model=BulkResultsResponse)
-async def get_bulk_results(
-    job_description_id: int,
+
+@router.post("/results", response_model=ResultsResponse)
+async def match_resume_to_jd(
+    resume_id: int = Query(..., description="ID of the resume to evaluate"),
+    job_description_id: int = Query(..., description="ID of the job description to compare against"),
     _: dict = Depends(hr_required),
     db: Session = Depends(get_db),
 ):
-    """Compare all resumes in DB against a specific JD and return summarized results."""
+    return await run_sync(_match_resume_to_jd, db, resume_id, job_description_id)
+
+
+BULK_CHUNK_SIZE = 256
+
+
+def _get_bulk_results(
+    db: Session, job_description_id: int, include_explanations: bool, force: bool
+) -> BulkResultsResponse:
     jd = db.query(JobDescription).filter(JobDescription.id == job_description_id).first()
     if not jd:
         raise HTTPException(status_code=404, detail="Job description not found")
 
-    resumes = db.query(Resume).all()
-    if not resumes:
-        raise HTTPException(status_code=404, detail="No resumes found")
+    jd_vec = ensure_document_embedding(jd)
+    jd_skills = ensure_jd_skills(jd)
+    db.commit()
 
     results = []
     total_score = 0
+    rescored = 0
 
-    for resume in resumes:
-        result = score_resume_against_jd(resume.text_content, jd.description_text)
+    # One chunk of ORM rows at a time: only the (small) result items outlive their chunk
+    for resumes in iter_ready_resumes(db, BULK_CHUNK_SIZE):
+        scored, matches = score_incrementally(db, jd, jd_vec, jd_skills, resumes, include_explanations, force)
+        for resume, result in zip(resumes, scored):
+            results.append(BulkResultItem(**result_item(jd, resume, result)))
+            total_score += result["score"]
+        upsert_matches(db, matches)
+        db.commit()
+        rescored += len(matches)
 
-        match_entry = Match(
-            resume_id=resume.id,
-            job_description_id=jd.id,
-            score=result["score"],
-            matched_skills=", ".join(result["matched_skills"]),
-            missing_skills=", ".join(result["missing_skills"]),
-            explanations="\n".join(result["explanations"]),
-            resume_s3_url=resume.s3_url,
-            jd_s3_url=jd.s3_url if hasattr(jd, "s3_url") else None,
+    if not results:
+        raise HTTPException(status_code=404, detail="No resumes found")
+
+    avg_score = total_score / len(results) if results else 0
+
+    return BulkResultsResponse(
+        job_description_id=jd.id,
+        job_description_title=jd.title,
+        total_resumes_processed=len(results),
+        resumes_rescored=rescored,
+        average_score=round(avg_score, 2),
+        results=results,
+    )
+
+
+@router.get("/results/bulk", response_model=BulkResultsResponse)
+async def get_bulk_results(
+    job_description_id: int,
+    include_explanations: bool = Query(True, description="Set false to skip sentence-level explanations for a faster ranking"),
+    force: bool = Query(False, description="Rescore every resume instead of reusing stored matches"),
+    _: dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """
+    Compare all resumes in DB against a specific JD and return summarized results.
+
+    Stored matches are reused for resumes unchanged since the last run for this JD, so a
+    rerun only scores new or modified resumes (or everything with force=true).
+
+    Scoring is bounded by BULK_TIMEOUT_SECONDS (no deadline by default), not the per-request
+    REQUEST_TIMEOUT_SECONDS; for large pools prefer a background job (POST /results/jobs).
+    """
+    return await run_sync(
+        _get_bulk_results, db, job_description_id, include_explanations, force, timeout=BULK_TIMEOUT_SECONDS
+    )
+
+
+STREAM_CHUNK_SIZE = 256
+STREAM_DEFAULT_TOP_K = 100
+
+
+def _format_event(event: str, payload: Dict, fmt: str) -> str:
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({"type": event, **payload}) + "\n"
+
+
+def _stream_bulk_results(
+    job_description_id: int,
+    limit: Optional[int],
+    min_score: int,
+    order: str,
+    fmt: str,
+    include_explanations: bool,
+    force: bool,
+) -> Iterator[str]:
+    # Own session: the request-scoped one from get_db is closed before the body streams
+    db = SessionLocal()
+    try:
+        jd = db.query(JobDescription).filter(JobDescription.id == job_description_id).first()
+        if jd is None:
+            # Deleted after the route's check; the 200 headers are already out, so end with an error record
+            yield _format_event("error", {"status_code": 404, "detail": "Job description not found"}, fmt)
+            return
+        jd_vec = ensure_document_embedding(jd)
+        jd_skills = ensure_jd_skills(jd)
+        db.commit()
+
+        top_k = limit or STREAM_DEFAULT_TOP_K
+        heap: List = []  # min-heap of (score, -resume_id, item); never larger than top_k
+        processed = 0
+        rescored = 0
+        emitted = 0
+        total_score = 0
+
+        for resumes in iter_ready_resumes(db, STREAM_CHUNK_SIZE):
+            scored, matches = score_incrementally(
+                db, jd, jd_vec, jd_skills, resumes, include_explanations, force
+            )
+            rescored += len(matches)
+            items = []
+            for resume, result in zip(resumes, scored):
+                processed += 1
+                total_score += result["score"]
+                if result["score"] >= min_score:
+                    items.append(result_item(jd, resume, result))
+            upsert_matches(db, matches)
+            db.commit()
+
+            for item in items:
+                if order == "score":
+                    entry = (item["score"], -item["resume_id"], item)
+                    if len(heap) < top_k:
+                        heapq.heappush(heap, entry)
+                    elif entry[:2] > heap[0][:2]:
+                        heapq.heapreplace(heap, entry)
+                else:
+                    yield _format_event("result", item, fmt)
+                    emitted += 1
+                    if limit and emitted >= limit:
+                        break
+            if order != "score" and limit and emitted >= limit:
+                break
+
+        if order == "score":
+            for _, _, item in sorted(heap, key=lambda e: e[:2], reverse=True):
+                yield _format_event("result", item, fmt)
+                emitted += 1
+
+        yield _format_event(
+            "summary",
+            {
+                "job_description_id": jd.id,
+                "job_description_title": jd.title,
+                "total_resumes_processed": processed,
+                "resumes_rescored": rescored,
+                "results_returned": emitted,
+                "average_score": round(total_score / processed, 2) if processed else 0,
+            },
+            fmt,
         )
-        db.add(match_entry)
+    finally:
+        db.close()
+
+
+def _job_description_exists(db: Session, job_description_id: int) -> bool:
+    return db.query(JobDescription.id).filter(JobDescription.id == job_description_id).first() is not None
+
 
-        results.append(
-            BulkResultItem(
+@router.get("/results/bulk/stream")
+async def stream_bulk_results(
+    job_description_id: int,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum results to emit; the K of top-K for order=score (default 100)"),
+    min_score: int = Query(0, ge=0, le=100, description="Only emit resumes scoring at least this"),
+    order: str = Query("id", pattern="^(id|score)$", description="id: stream as scored; score: top-K at the end"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    include_explanations: bool = Query(True, description="Set false to skip sentence-level explanations for a faster ranking"),
+    force: bool = Query(False, description="Rescore every resume instead of reusing stored matches"),
+    _: dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """
+    Streaming variant of /results/bulk (same incremental reuse of stored matches).
+
+    Resumes are scored in chunks of STREAM_CHUNK_SIZE and each chunk's results are
+    emitted (NDJSON lines or server-sent events) as soon as it completes, followed by a
+    summary event (or a single error event if the JD is gone by the time the body starts).
+    order=score keeps only the best ``limit`` results in a bounded heap and emits them,
+    best first, once every resume is scored.
+    """
+    if not await run_sync(_job_description_exists, db, job_description_id):
+        raise HTTPException(status_code=404, detail="Job description not found")
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_bulk_results(job_description_id, limit, min_score, order, format, include_explanations, force),
+        media_type=media_type,
+    )
+
+
+MATRIX_MAX_JOB_DESCRIPTIONS = 100
+MATRIX_MAX_TOP_N = 1000
+MATRIX_CHUNK_SIZE = 1000
+
+
+class _MatrixResume(NamedTuple):
+    id: int
+    candidate_name: Optional[str]
+    s3_url: Optional[str]
+
+
+def _get_matrix_results(db: Session, request: MatrixResultsRequest) -> MatrixResultsResponse:
+    jd_ids = list(dict.fromkeys(request.job_description_ids))
+    if not jd_ids or len(jd_ids) > MATRIX_MAX_JOB_DESCRIPTIONS:
+        raise HTTPException(
+            status_code=400, detail=f"Provide 1 to {MATRIX_MAX_JOB_DESCRIPTIONS} job_description_ids"
+        )
+    if not 1 <= request.top_n <= MATRIX_MAX_TOP_N or request.best_fit_n < 1:
+        raise HTTPException(status_code=400, detail=f"top_n must be 1-{MATRIX_MAX_TOP_N} and best_fit_n at least 1")
+
+    found = {jd.id: jd for jd in db.query(JobDescription).filter(JobDescription.id.in_(jd_ids)).all()}
+    missing = [jd_id for jd_id in jd_ids if jd_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Job descriptions not found: {missing}")
+    jds = [found[jd_id] for jd_id in jd_ids]
+
+    criteria = []
+    if request.resume_ids:
+        criteria.append(Resume.id.in_(request.resume_ids))
+    if request.min_experience_years is not None:
+        criteria.append(Resume.total_experience_years >= request.min_experience_years)
+
+    # Chunked over the resume pool: only ids, names and the integer score rows are kept
+    jd_matrix = np.stack(ensure_document_embeddings(jds))
+    resumes: List[_MatrixResume] = []
+    score_chunks = []
+    for chunk in iter_ready_resumes(db, MATRIX_CHUNK_SIZE, criteria=criteria):
+        score_chunks.append(similarity_matrix_0_100(resume_vectors(chunk), jd_matrix))
+        resumes.extend(_MatrixResume(r.id, r.candidate_name, r.s3_url) for r in chunk)
+        db.commit()  # persist embeddings backfilled for this chunk
+    if not resumes:
+        raise HTTPException(status_code=404, detail="No resumes found")
+    scores = np.concatenate(score_chunks)  # (resumes, JDs)
+
+    # Stable sort on the negated scores: ties keep resume id order
+    top_n = min(request.top_n, len(resumes))
+    ranked = [np.argsort(-scores[:, j], kind="stable")[:top_n] for j in range(len(jds))]
+
+    skills: Dict[int, List[str]] = {}
+    if request.include_skills:
+        skills = resume_skills(db, sorted({resumes[int(i)].id for order in ranked for i in order}))
+        jd_skills = [ensure_jd_skills(jd) for jd in jds]
+    db.commit()  # persist anything backfilled above
+
+    rankings = []
+    for j, jd in enumerate(jds):
+        items = []
+        for i in ranked[j]:
+            resume = resumes[i]
+            item = MatrixRankedResume(
                 resume_id=resume.id,
-                job_description_id=jd.id,
-                score=result["score"],
-                matched_skills=result["matched_skills"],
-                missing_skills=result["missing_skills"],
-                explanations=result["explanations"],
+                candidate_name=resume.candidate_name,
+                score=int(scores[i, j]),
                 resume_s3_url=resume.s3_url,
-                jd_s3_url=jd.s3_url if hasattr(jd, "s3_url") else None,
             )
+            if request.include_skills:
+                item.matched_skills, item.missing_skills = match_skills(skills[resume.id], jd_skills[j])
+            items.append(item)
+        rankings.append(
+            MatrixJobRanking(
+                job_description_id=jd.id,
+                job_description_title=jd.title,
+                average_score=round(float(scores[:, j].mean()), 2),
+                results=items,
+            )
+        )
+
+    best_fit_n = min(request.best_fit_n, len(jds))
+    best = np.argsort(-scores, axis=1, kind="stable")[:, :best_fit_n]
+    best_fits = [
+        MatrixResumeBestFit(
+            resume_id=resume.id,
+            candidate_name=resume.candidate_name,
+            best_fits=[
+                MatrixBestFit(
+                    job_description_id=jds[j].id,
+                    job_description_title=jds[j].title,
+                    score=int(scores[i, j]),
+                )
+                for j in best[i]
+            ],
         )
-        total_score += result["score"]
+        for i, resume in enumerate(resumes)
+    ]
 
+    return MatrixResultsResponse(
+        total_resumes=len(resumes),
+        total_job_descriptions=len(jds),
+        rankings=rankings,
+        best_fits=best_fits,
+    )
+
+
+@router.post("/results/matrix", response_model=MatrixResultsResponse)
+async def get_matrix_results(
+    request: MatrixResultsRequest,
+    _: dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """
+    Score a resume pool against several JDs in one pass.
+
+    Resume vectors are read from the embedding store in chunks of MATRIX_CHUNK_SIZE and
+    each chunk is scored against every JD with one matrix product. Returns the top_n
+    resumes for each JD and the best_fit_n JDs for each resume. Like /results/bulk it is
+    bounded by BULK_TIMEOUT_SECONDS rather than REQUEST_TIMEOUT_SECONDS.
+    """
+    return await run_sync(_get_matrix_results, db, request, timeout=BULK_TIMEOUT_SECONDS)
+
+
+INDEX_SYNC_CHUNK_SIZE = 500
+
+
+def _get_synced_index(db: Session) -> ResumeVectorIndex:
+    """
+    Return the resume index, topped up with the ready resumes above its id watermark.
+
+    Each worker process has its own index, so resumes ingested by another worker reach it
+    only here. Vectors come from the shared embedding store. The watermark stops below the
+    oldest resume still being ingested, so one that becomes ready out of id order is picked
+    up by a later call.
+    """
+    index = get_resume_index()
+    candidates = db.query(Resume.id, Resume.status).filter(Resume.id > index.synced_through).order_by(Resume.id).all()
+    if not candidates:
+        return index
+    missing_ids = [rid for rid, status in candidates if status == STATUS_READY and rid not in index]
+    unfinished = [rid for rid, status in candidates if status not in (STATUS_READY, STATUS_FAILED)]
+    for start in range(0, len(missing_ids), INDEX_SYNC_CHUNK_SIZE):
+        chunk_ids = missing_ids[start : start + INDEX_SYNC_CHUNK_SIZE]
+        rows = (
+            db.query(Resume)
+            .options(*(defer(column) for column in DEFERRED_RESUME_COLUMNS))
+            .filter(Resume.id.in_(chunk_ids))
+            .all()
+        )
+        vectors = resume_vectors(rows)
+        db.commit()
+        index.add_many([row.id for row in rows], vectors)
+    index.synced_through = unfinished[0] - 1 if unfinished else candidates[-1][0]
+    if missing_ids:
+        index.save()
+    return index
+
+
+def _get_top_results(db: Session, job_description_id: int, k: int, rescore: bool) -> ShortlistResponse:
+    jd = db.query(JobDescription).filter(JobDescription.id == job_description_id).first()
+    if not jd:
+        raise HTTPException(status_code=404, detail="Job description not found")
+
+    jd_vec = ensure_document_embedding(jd)
+    jd_skills = ensure_jd_skills(jd)
     db.commit()
 
-    avg_score = total_score / len(results) if results else 0
+    index = _get_synced_index(db)
+    hits = index.search(jd_vec, k)
+    rows = {row.id: row for row in db.query(Resume).filter(Resume.id.in_([rid for rid, _ in hits])).all()}
 
-    return BulkResultsResponse(
+    results = []
+    for resume_id, similarity in hits:
+        resume = rows.get(resume_id)
+        if resume is None:  # deleted since it was indexed
+            continue
+        item = ShortlistItem(
+            resume_id=resume.id,
+            score=similarity_to_score_0_100(similarity),
+            candidate_name=resume.candidate_name,
+            resume_s3_url=resume.s3_url,
+        )
+        if rescore:
+            features = ensure_resume_features([resume])[0]
+            result = score_resume_against_jd(
+                resume.text_content,
+                jd.description_text,
+                ensure_document_embedding(resume),
+                jd_vec,
+                resume_skills=features.skills,
+                jd_skills=jd_skills,
+                resume_sentences=features.sentences,
+                resume_sentence_vecs=features.sentence_vecs,
+            )
+            item.score = result["score"]
+            item.matched_skills = result["matched_skills"]
+            item.missing_skills = result["missing_skills"]
+            item.explanations = result["explanations"]
+        results.append(item)
+
+    if rescore:
+        db.commit()  # persist any features backfilled above
+        results.sort(key=lambda item: item.score, reverse=True)
+
+    return ShortlistResponse(
         job_description_id=jd.id,
         job_description_title=jd.title,
-        total_resumes_processed=len(results),
-        average_score=round(avg_score, 2),
+        index_backend=index.backend,
+        rescored=rescore,
         results=results,
     )
+
+
+@router.get("/results/top", response_model=ShortlistResponse)
+async def get_top_results(
+    job_description_id: int,
+    k: int = Query(20, ge=1, le=1000, description="Number of candidates to return"),
+    rescore: bool = Query(False, description="Run full scoring (skills, explanations) on the K candidates"),
+    _: dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """Shortlist the K resumes nearest to a JD using the resume vector index."""
+    return await run_sync(_get_top_results, db, job_description_id, k, rescore)
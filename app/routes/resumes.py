@@ -1,16 +1,37 @@
-from typing import Dict
-from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
 import traceback
+import zipfile
+from io import BytesIO
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
 
 from app.models.database import get_db
 from app.models.entities import Resume
 from app.routes.auth import hr_required
-from app.utils.parsers import extract_text
-from app.utils.nlp import extract_fields
-from app.schemas.resume import ResumeUploadResponse
-from app.utils.s3_client import upload_resume as upload_to_s3  
+from app.utils.concurrency import run_sync
+from app.utils.features import ensure_document_embeddings, ensure_resume_features
+from app.utils.ingest import (
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_READY,
+    apply_parsed_document,
+    extract_fields_batch,
+    extract_upload_text,
+)
+from app.utils.ingest_queue import get_ingest_queue
+from app.utils.metrics import count_documents
+from app.utils.parsers import sniff_extension
+from app.utils.s3_client import upload_resume as upload_to_s3
+from app.utils.embedding_store import get_resume_embedding_store
+from app.utils.vector_index import get_resume_index
+from app.schemas.resume import (
+    BatchUploadItem,
+    BatchUploadResponse,
+    ResumeStatusResponse,
+    ResumeUploadResponse,
+)
 
 router = APIRouter()
 
@@ -21,6 +42,77 @@ ALLOWED_CONTENT_TYPES = {
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
     "text/plain",
 }
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+MAX_BATCH_FILES = 500
+S3_UPLOAD_CONCURRENCY = 16
+
+
+def _resume_response(resume: Resume, model=ResumeUploadResponse, **extra) -> ResumeUploadResponse:
+    return model(
+        resume_id=resume.id,
+        filename=resume.filename,
+        status=resume.status,
+        parser=resume.parser,
+        candidate_name=resume.candidate_name,
+        candidate_email=resume.candidate_email,
+        skills=resume.skills.split(", ") if resume.skills else [],
+        total_experience_years=resume.total_experience_years,
+        s3_url=resume.s3_url,
+        **extra,
+    )
+
+
+def _find_duplicates(db: Session, hashes: Iterable[str]) -> Dict[str, Resume]:
+    """Oldest non-failed resume for each content hash that has already been uploaded."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    found: Dict[str, Resume] = {}
+    rows = (
+        db.query(Resume)
+        .filter(Resume.content_hash.in_(hashes), Resume.status != STATUS_FAILED)
+        .order_by(Resume.id)
+        .all()
+    )
+    for row in rows:
+        found.setdefault(row.content_hash, row)
+    return found
+
+
+def _queue_upload(db: Session, filename: str, content_type: Optional[str], contents: bytes) -> ResumeUploadResponse:
+    # --- Same file uploaded before: reuse its parse, S3 object and embeddings ---
+    content_hash = hashlib.sha256(contents).hexdigest()
+    duplicate = _find_duplicates(db, [content_hash]).get(content_hash)
+    if duplicate is not None:
+        return _resume_response(duplicate, deduplicated=True)
+
+    # --- Queue for background parsing; the row is filled in by the ingest worker ---
+    try:
+        resume = Resume(
+            filename=filename,
+            content_type=content_type,
+            content_hash=content_hash,
+            status=STATUS_PENDING,
+        )
+        db.add(resume)
+        db.commit()
+        db.refresh(resume)
+    except Exception as e:
+        db.rollback()
+        print("❌ Database Error:", str(e))
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Failed to save resume")
+
+    try:
+        get_ingest_queue().enqueue(resume.id, filename, content_type, contents)
+    except Exception as e:
+        print("Ingest enqueue failed:", traceback.format_exc())
+        resume.status = STATUS_FAILED
+        resume.error = f"Failed to queue resume: {str(e)}"
+        db.commit()
+        raise HTTPException(status_code=500, detail="Failed to queue resume")
+
+    return ResumeUploadResponse(resume_id=resume.id, filename=resume.filename, status=resume.status)
 
 
 @router.post("/upload_resume", response_model=ResumeUploadResponse)
@@ -30,10 +122,12 @@ async def upload_resume(
     db: Session = Depends(get_db),
 ):
     """
-    Upload and parse a candidate resume.
-    - Extracts text and metadata (name, email, skills, exp)
-    - Uploads to S3/resumes/
-    - Stores all metadata and URL in database
+    Upload a candidate resume for background processing.
+    - Returns the existing resume (deduplicated=true) if the same file was uploaded before
+    - Validates and stores the file in the durable ingest queue
+    - Returns immediately with status=pending; poll /resumes/{id}/status
+    - The ingest worker extracts text and metadata (name, email, skills, exp),
+      uploads to S3/resumes/ and stores everything in the database
     """
 
     # --- Validate content type ---
@@ -52,59 +146,238 @@ async def upload_resume(
     if len(contents) > MAX_FILE_SIZE_BYTES:
         raise HTTPException(status_code=413, detail="File too large (max 10 MB)")
 
-    # --- Extract text ---
+    return await run_sync(_queue_upload, db, file.filename, file.content_type, contents)
+
+
+def _get_resume_status(db: Session, resume_id: int) -> ResumeStatusResponse:
+    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    return _resume_response(
+        resume,
+        ResumeStatusResponse,
+        error=resume.error,
+        queue_position=get_ingest_queue().position(resume.id) if resume.status == STATUS_PENDING else None,
+    )
+
+
+@router.get("/resumes/{resume_id}/status", response_model=ResumeStatusResponse)
+async def get_resume_status(
+    resume_id: int,
+    _: Dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """Report ingest progress for an uploaded resume, and its parsed fields once ready."""
+    return await run_sync(_get_resume_status, db, resume_id)
+
+
+def _expand_zip(contents: bytes) -> List[Tuple[str, Optional[str], Optional[bytes], Optional[str]]]:
+    entries = []
+    with zipfile.ZipFile(BytesIO(contents)) as archive:
+        members = archive.infolist()
+        if len(members) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=413, detail=f"Too many files (max {MAX_BATCH_FILES})")
+        for info in members:
+            name = info.filename.rsplit("/", 1)[-1]
+            if info.is_dir() or not name or info.filename.startswith("__MACOSX/") or name.startswith("."):
+                continue
+            if sniff_extension(name) == "unknown":
+                entries.append((name, None, None, "Unsupported file type"))
+            elif info.file_size > MAX_FILE_SIZE_BYTES:  # checked before reading: guards zip bombs
+                entries.append((name, None, None, "File too large (max 10 MB)"))
+            else:
+                entries.append((name, None, archive.read(info), None))
+    return entries
+
+
+async def _collect_batch_files(
+    files: List[UploadFile],
+) -> List[Tuple[str, Optional[str], Optional[bytes], Optional[str]]]:
+    """Read uploads (expanding zips) into (filename, content_type, contents, error) entries."""
+    entries = []
+    for file in files:
+        try:
+            contents = await file.read()
+        except Exception:
+            entries.append((file.filename, file.content_type, None, "Unable to read uploaded file"))
+            continue
+        if file.content_type in ZIP_CONTENT_TYPES or (file.filename or "").lower().endswith(".zip"):
+            try:
+                entries.extend(_expand_zip(contents))
+            except zipfile.BadZipFile:
+                entries.append((file.filename, file.content_type, None, "Invalid zip archive"))
+        elif file.content_type and file.content_type not in ALLOWED_CONTENT_TYPES:
+            entries.append((file.filename, file.content_type, None, "Unsupported content type"))
+        elif not contents:
+            entries.append((file.filename, file.content_type, None, "Empty file"))
+        elif len(contents) > MAX_FILE_SIZE_BYTES:
+            entries.append((file.filename, file.content_type, None, "File too large (max 10 MB)"))
+        else:
+            entries.append((file.filename, file.content_type, contents, None))
+        # Cumulative, so several archives cannot add up past the cap
+        if len(entries) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=413, detail=f"Too many files (max {MAX_BATCH_FILES})")
+    return entries
+
+
+def _content_hashes(entries: List[Tuple], errors: List[Optional[str]]) -> Dict[int, str]:
+    return {i: hashlib.sha256(entry[2]).hexdigest() for i, entry in enumerate(entries) if errors[i] is None}
+
+
+def _save_batch(db: Session, resumes: List[Resume]) -> None:
+    """Embed and featurize new resumes in batched passes, insert them in one commit, then index and store them."""
+    vectors = ensure_document_embeddings(resumes)
+    ensure_resume_features(resumes)
+    db.add_all(resumes)
+    db.flush()
+    ids = [r.id for r in resumes]
+    # Keep the rows loaded: expiring them would reload each one (blobs included) for the response
+    db.expire_on_commit = False
     try:
-        text, used_parser = extract_text(file.filename, file.content_type or "", contents)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse file: {str(e)}")
+        db.commit()
+    finally:
+        db.expire_on_commit = True
+    count_documents("ingest", len(resumes))
+    try:
+        get_resume_index().add_many(ids, vectors)
+    except Exception:
+        print("Vector index update failed:", traceback.format_exc())
+    try:
+        get_resume_embedding_store().append_many(ids, vectors)
+    except Exception:
+        print("Embedding store update failed:", traceback.format_exc())
 
-    if not text or not text.strip():
-        raise HTTPException(status_code=400, detail="Could not extract text from file")
 
-    # --- Extract candidate info ---
-    fields = extract_fields(text)
+def _batch_response(
+    entries: List[Tuple],
+    errors: List[Optional[str]],
+    hashes: Dict[int, str],
+    existing: Dict[str, Resume],
+    rows: Dict[int, Resume],
+    same_as: Dict[int, int],
+) -> BatchUploadResponse:
+    results = []
+    for i, entry in enumerate(entries):
+        filename = entry[0]
+        duplicate = existing.get(hashes.get(i)) or rows.get(same_as.get(i))
+        if duplicate is not None:
+            results.append(
+                BatchUploadItem(
+                    filename=filename,
+                    status=duplicate.status,
+                    resume=_resume_response(duplicate, deduplicated=True),
+                )
+            )
+        elif i in rows:
+            results.append(BatchUploadItem(filename=filename, status=STATUS_READY, resume=_resume_response(rows[i])))
+        else:
+            error = errors[same_as[i]] if i in same_as else errors[i]
+            results.append(BatchUploadItem(filename=filename, status=STATUS_FAILED, error=error))
 
-    # --- Upload to S3 ---
+    succeeded = sum(1 for item in results if item.status != STATUS_FAILED)
+    return BatchUploadResponse(
+        total_files=len(entries),
+        succeeded=succeeded,
+        failed=len(entries) - succeeded,
+        results=results,
+    )
+
+
+@router.post("/upload_resumes", response_model=BatchUploadResponse)
+async def upload_resumes(
+    files: List[UploadFile] = File(...),
+    _: Dict = Depends(hr_required),
+    db: Session = Depends(get_db),
+):
+    """
+    Upload many resumes (individual files and/or zip archives) in one request.
+    - Files already uploaded (same content hash) reuse the existing resume
+    - Extracts text from all files in parallel on the parse process pool, then names
+      with one batched NER pass split across the pool
+    - Embeds every parsed resume in one batched encode pass
+    - Inserts all Resume rows in a single commit
+    - Uploads to S3/resumes/ concurrently (bounded)
+    Returns a per-file result; one bad file does not fail the batch.
+    """
+    entries = await _collect_batch_files(files)
+    errors: List[Optional[str]] = [entry[3] for entry in entries]
+
+    # --- Dedup by content hash, against the DB and within the batch ---
+    hashes: Dict[int, str] = await run_sync(_content_hashes, entries, errors)
+    existing = await run_sync(_find_duplicates, db, list(hashes.values()))
+    first_of_hash: Dict[str, int] = {}
+    same_as: Dict[int, int] = {}
+    todo = []
+    for i, content_hash in hashes.items():
+        if content_hash in existing:
+            continue
+        if content_hash in first_of_hash:
+            same_as[i] = first_of_hash[content_hash]
+            continue
+        first_of_hash[content_hash] = i
+        todo.append(i)
+
+    # --- Extract text in parallel on the parse pool, then fields with one batched NER pass ---
+    text_list = await asyncio.gather(
+        *(asyncio.to_thread(extract_upload_text, entries[i][0], entries[i][1], entries[i][2]) for i in todo),
+        return_exceptions=True,
+    )
+    texts: Dict[int, Tuple[str, str]] = {}
+    for i, result in zip(todo, text_list):
+        if isinstance(result, Exception):
+            errors[i] = f"Failed to parse file: {str(result)}"
+        else:
+            texts[i] = result
+    parsed: Dict[int, Dict] = {}
     try:
-        file_obj = BytesIO(contents)
-        s3_url = await upload_to_s3(
-            file_obj,
-            file.filename,
-            content_type=file.content_type,
-            folder="resumes"
-        )
+        fields_list = await asyncio.to_thread(extract_fields_batch, [texts[i][0] for i in texts])
     except Exception as e:
-        print("S3 upload failed:", traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Failed to upload to S3: {str(e)}")
+        for i in texts:
+            errors[i] = f"Failed to parse file: {str(e)}"
+    else:
+        for (i, (text, used_parser)), fields in zip(texts.items(), fields_list):
+            parsed[i] = {"text": text, "parser": used_parser, "fields": fields}
 
-    # --- Save to DB ---
-    try:
+    # --- Upload to S3 with bounded concurrency ---
+    semaphore = asyncio.Semaphore(S3_UPLOAD_CONCURRENCY)
+
+    async def _upload(i: int) -> str:
+        filename, content_type, contents = entries[i][:3]
+        async with semaphore:
+            return await upload_to_s3(BytesIO(contents), filename, content_type=content_type, folder="resumes")
+
+    upload_ids = sorted(parsed)
+    urls = await asyncio.gather(*(_upload(i) for i in upload_ids), return_exceptions=True)
+    s3_urls: Dict[int, str] = {}
+    for i, url in zip(upload_ids, urls):
+        if isinstance(url, Exception):
+            errors[i] = f"Failed to upload to S3: {str(url)}"
+        else:
+            s3_urls[i] = url
+
+    # --- Build rows, embed in one batch, insert in one commit ---
+    rows: Dict[int, Resume] = {}
+    for i in sorted(s3_urls):
         resume = Resume(
-            filename=file.filename,
-            content_type=file.content_type or used_parser,
-            text_content=text,
-            candidate_name=fields.get("candidate_name"),
-            candidate_email=fields.get("candidate_email"),
-            skills=fields.get("skills"),
-            total_experience_years=fields.get("total_experience_years"),
-            s3_url=s3_url,
+            filename=entries[i][0],
+            content_type=entries[i][1],
+            content_hash=hashes[i],
+            status=STATUS_READY,
         )
-        db.add(resume)
-        db.commit()
-        db.refresh(resume)
-    except Exception as e:
-        db.rollback()
-        print("❌ Database Error:", str(e))
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail="Failed to save resume")
+        apply_parsed_document(resume, parsed[i], s3_urls[i])
+        rows[i] = resume
 
-    return ResumeUploadResponse(
-        resume_id=resume.id,
-        filename=resume.filename,
-        parser=used_parser,
-        candidate_name=resume.candidate_name,
-        candidate_email=resume.candidate_email,
-        skills=resume.skills.split(", ") if resume.skills else [],
-        total_experience_years=resume.total_experience_years,
-        s3_url=resume.s3_url,
-    )
+    if rows:
+        resumes = list(rows.values())
+        try:
+            # No request deadline: the batch's encoding must not time out after the S3 uploads
+            await run_sync(_save_batch, db, resumes, timeout=None)
+        except Exception as e:
+            await run_sync(db.rollback)
+            print("❌ Database Error:", str(e))
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail="Failed to save resumes")
+
+    # Duplicates found in the DB may still load lazily, so build the response off the loop too
+    return await run_sync(_batch_response, entries, errors, hashes, existing, rows, same_as)
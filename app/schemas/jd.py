@@ -11,4 +11,5 @@ class JobDescriptionResponse(BaseModel):
     job_description_id: int
     title: Optional[str]
     skills: List[str] = Field(default_factory=list) 
-    file_url: Optional[str]
\ No newline at end of file
+    file_url: Optional[str]
+    deduplicated: bool = False
\ No newline at end of file
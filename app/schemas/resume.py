@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
@@ -5,12 +6,33 @@ from pydantic import BaseModel, Field
 class ResumeUploadResponse(BaseModel):
     resume_id: int
     filename: str
-    parser: str
-    candidate_name: Optional[str]
-    candidate_email: Optional[str]
+    status: str = "ready"
+    parser: Optional[str] = None
+    candidate_name: Optional[str] = None
+    candidate_email: Optional[str] = None
     skills: List[str] = Field(default_factory=list)
-    total_experience_years: Optional[int]
-    s3_url: Optional[str]
+    total_experience_years: Optional[int] = None
+    s3_url: Optional[str] = None
+    deduplicated: bool = False
+
+
+class ResumeStatusResponse(ResumeUploadResponse):
+    error: Optional[str] = None
+    queue_position: Optional[int] = None
+
+
+class BatchUploadItem(BaseModel):
+    filename: str
+    status: str
+    error: Optional[str] = None
+    resume: Optional[ResumeUploadResponse] = None
+
+
+class BatchUploadResponse(BaseModel):
+    total_files: int
+    succeeded: int
+    failed: int
+    results: List[BatchUploadItem]
 
 
 class ResultsResponse(BaseModel):
@@ -46,5 +68,88 @@ class BulkResultsResponse(BaseModel):
     job_description_id: int
     job_description_title: Optional[str]
     total_resumes_processed: int
+    resumes_rescored: int = 0
     average_score: float
     results: List[BulkResultItem]
+
+
+class ShortlistItem(BaseModel):
+    resume_id: int
+    score: int
+    candidate_name: Optional[str]
+    resume_s3_url: Optional[str]
+    matched_skills: Optional[List[str]] = None
+    missing_skills: Optional[List[str]] = None
+    explanations: Optional[List[str]] = None
+
+
+class ShortlistResponse(BaseModel):
+    job_description_id: int
+    job_description_title: Optional[str]
+    index_backend: str
+    rescored: bool
+    results: List[ShortlistItem]
+
+
+class MatchJobResponse(BaseModel):
+    job_id: int
+    job_description_id: int
+    status: str
+    include_explanations: bool
+    total_resumes: Optional[int] = None
+    processed: int = 0
+    resumes_rescored: int = 0
+    progress_percent: float = 0.0
+    eta_seconds: Optional[float] = None
+    average_score: Optional[float] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Best results so far, best first (final once status is completed)
+    results: List[BulkResultItem] = Field(default_factory=list)
+
+
+class MatrixResultsRequest(BaseModel):
+    job_description_ids: List[int]
+    # Optional resume filter; by default every ready resume is scored
+    resume_ids: Optional[List[int]] = None
+    min_experience_years: Optional[int] = None
+    top_n: int = 20
+    best_fit_n: int = 3
+    include_skills: bool = False
+
+
+class MatrixRankedResume(BaseModel):
+    resume_id: int
+    candidate_name: Optional[str]
+    score: int
+    resume_s3_url: Optional[str] = None
+    matched_skills: Optional[List[str]] = None
+    missing_skills: Optional[List[str]] = None
+
+
+class MatrixJobRanking(BaseModel):
+    job_description_id: int
+    job_description_title: Optional[str]
+    average_score: float
+    results: List[MatrixRankedResume]
+
+
+class MatrixBestFit(BaseModel):
+    job_description_id: int
+    job_description_title: Optional[str]
+    score: int
+
+
+class MatrixResumeBestFit(BaseModel):
+    resume_id: int
+    candidate_name: Optional[str]
+    best_fits: List[MatrixBestFit]
+
+
+class MatrixResultsResponse(BaseModel):
+    total_resumes: int
+    total_job_descriptions: int
+    rankings: List[MatrixJobRanking]
+    best_fits: List[MatrixResumeBestFit]
@@ -0,0 +1,240 @@
+from datetime import datetime, timezone
+import json
+import traceback
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, defer, load_only, object_session
+
+from app.models.entities import JobDescription, Match, Resume
+from app.utils.embedding_store import get_resume_embedding_store
+from app.utils.embeddings import is_embedding_stale
+from app.utils.features import (
+    FEATURES_VERSION,
+    SCORER_VERSION,
+    ensure_document_embeddings,
+    ensure_resume_features,
+)
+from app.utils.ingest import STATUS_READY
+from app.utils.scoring import score_resumes_against_jd
+
+
+# Large per-resume columns: bulk paths defer them and load them only for the rows a stage needs
+DEFERRED_RESUME_COLUMNS = (Resume.text_content, Resume.embedding, Resume.sentences, Resume.sentence_embeddings)
+_LOAD_CHUNK_SIZE = 500
+
+
+def load_deferred(resumes: Sequence[Resume], *columns) -> None:
+    """Load ``columns`` of the resumes that lack them with one query per chunk, not one lazy load per row."""
+    pending = [r for r in resumes if any(column.key in inspect(r).unloaded for column in columns)]
+    if not pending:
+        return
+    db = object_session(pending[0])
+    for start in range(0, len(pending), _LOAD_CHUNK_SIZE):
+        ids = [r.id for r in pending[start : start + _LOAD_CHUNK_SIZE]]
+        # Fills the unloaded attributes of the instances already in the session
+        db.query(Resume).options(load_only(*columns)).filter(Resume.id.in_(ids)).all()
+
+
+def resume_vectors(resumes: Sequence[Resume]) -> np.ndarray:
+    """
+    Document vectors of ``resumes`` as one float32 matrix, read from the shared embedding
+    store. Resumes missing from it fall back to their row (backfilled if stale) and are
+    appended, so the next call finds them.
+    """
+    store = get_resume_embedding_store()
+    try:
+        vectors, found = store.get_many([r.id for r in resumes])
+    except Exception:
+        print("Embedding store read failed:", traceback.format_exc())
+        vectors, found = np.zeros((len(resumes), 0), dtype=np.float32), np.zeros(len(resumes), dtype=bool)
+    if found.all():
+        return vectors
+
+    missing = [resume for resume, ok in zip(resumes, found) if not ok]
+    load_deferred(missing, Resume.embedding)
+    load_deferred([r for r in missing if is_embedding_stale(r.embedding, r.embedding_model)], Resume.text_content)
+    fresh = np.stack(ensure_document_embeddings(missing))
+    try:
+        store.append_many([r.id for r in missing], fresh)
+    except Exception:
+        print("Embedding store update failed:", traceback.format_exc())
+    if vectors.shape[1] != fresh.shape[1]:
+        vectors = np.zeros((len(resumes), fresh.shape[1]), dtype=np.float32)
+    vectors[~found] = fresh
+    return vectors
+
+
+def resume_skills(db: Session, resume_ids: Sequence[int]) -> Dict[int, List[str]]:
+    """Extracted skills per resume id, backfilling stale features, without loading the other heavy columns."""
+    skills: Dict[int, List[str]] = {}
+    for start in range(0, len(resume_ids), _LOAD_CHUNK_SIZE):
+        rows = (
+            db.query(Resume)
+            .options(*(defer(column) for column in DEFERRED_RESUME_COLUMNS))
+            .filter(Resume.id.in_(resume_ids[start : start + _LOAD_CHUNK_SIZE]))
+            .all()
+        )
+        stale = [r for r in rows if r.features_version != FEATURES_VERSION]
+        load_deferred(stale, Resume.text_content, Resume.sentences, Resume.sentence_embeddings)
+        ensure_resume_features(stale)
+        skills.update({r.id: r.skill_list or [] for r in rows})
+    return skills
+
+
+def compact_embedding_store(db: Session) -> int:
+    """Drop store rows of deleted (or no longer ready) resumes and superseded rows."""
+    live_ids = [rid for (rid,) in db.query(Resume.id).filter(Resume.status == STATUS_READY).all()]
+    return get_resume_embedding_store().compact(live_ids)
+
+
+def score_resumes(jd: JobDescription, jd_vec: np.ndarray, jd_skills, resumes, explain: bool):
+    """Batch-score resumes against a JD from their stored (or backfilled) features."""
+    if not resumes:
+        return []
+    resume_vecs = resume_vectors(resumes)
+    load_deferred(resumes, Resume.sentences, Resume.sentence_embeddings)
+    load_deferred([r for r in resumes if r.features_version != FEATURES_VERSION], Resume.text_content)
+    features = ensure_resume_features(resumes)
+    return score_resumes_against_jd(
+        # Vectors, skills and sentences are all precomputed, so the scorer never reads the texts
+        None,
+        jd.description_text,
+        resume_vecs,
+        jd_vec,
+        explain=explain,
+        resume_skills=[f.skills for f in features],
+        jd_skills=jd_skills,
+        resume_sentences=[f.sentences for f in features],
+        resume_sentence_vecs=[f.sentence_vecs for f in features],
+    )
+
+
+def result_item(jd: JobDescription, resume: Resume, result: Dict) -> Dict:
+    return {
+        "resume_id": resume.id,
+        "job_description_id": jd.id,
+        "score": result["score"],
+        "matched_skills": result["matched_skills"],
+        "missing_skills": result["missing_skills"],
+        "explanations": result["explanations"],
+        "resume_s3_url": resume.s3_url,
+        "jd_s3_url": jd.file_url,
+    }
+
+
+def _scorer_stamp(explain: bool) -> str:
+    return SCORER_VERSION if explain else f"{SCORER_VERSION}+noexplain"
+
+
+def match_values(jd: JobDescription, resume: Resume, result: Dict, explain: bool) -> Dict:
+    return {
+        "resume_id": resume.id,
+        "job_description_id": jd.id,
+        "score": result["score"],
+        "matched_skills": ", ".join(result["matched_skills"]),
+        "missing_skills": ", ".join(result["missing_skills"]),
+        # JSON list, so a cached rerun returns exactly the strings a fresh scoring does
+        "explanations": json.dumps(result["explanations"]),
+        "resume_s3_url": resume.s3_url,
+        "jd_s3_url": jd.file_url,
+        "scorer_version": _scorer_stamp(explain),
+    }
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes even for timezone-aware columns
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _is_reusable(resume: Resume, match: Optional[Match], explain: bool) -> bool:
+    """A stored match can be served if it is newer than the resume and from this scorer."""
+    if match is None:
+        return False
+    accepted = (SCORER_VERSION,) if explain else (SCORER_VERSION, _scorer_stamp(False))
+    if match.scorer_version not in accepted:
+        return False
+    updated_at, scored_at = as_utc(resume.updated_at), as_utc(match.created_at)
+    return not (updated_at and scored_at and updated_at > scored_at)
+
+
+def _stored_explanations(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    try:
+        explanations = json.loads(value)
+        if isinstance(explanations, list):
+            return explanations
+    except ValueError:
+        pass
+    return value.split("\n")  # rows written before explanations were stored as JSON
+
+
+def _cached_result(match: Match) -> Dict:
+    return {
+        "score": int(match.score),
+        "matched_skills": match.matched_skills.split(", ") if match.matched_skills else [],
+        "missing_skills": match.missing_skills.split(", ") if match.missing_skills else [],
+        "explanations": _stored_explanations(match.explanations),
+    }
+
+
+def score_incrementally(
+    db: Session,
+    jd: JobDescription,
+    jd_vec: np.ndarray,
+    jd_skills: List[str],
+    resumes: List[Resume],
+    explain: bool,
+    force: bool,
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Score resumes against a JD, reusing stored matches where still valid.
+
+    Only resumes without a match, modified since their match was computed, or scored by
+    another SCORER_VERSION go through the scorer (all of them when ``force``). Returns
+    the results aligned with ``resumes`` and the Match rows to upsert for the rescored ones.
+    """
+    cached: Dict[int, Match] = {}
+    if not force and resumes:
+        rows = (
+            db.query(Match)
+            .filter(Match.job_description_id == jd.id, Match.resume_id.in_([r.id for r in resumes]))
+            .all()
+        )
+        cached = {m.resume_id: m for m in rows}
+
+    to_score = [r for r in resumes if not _is_reusable(r, cached.get(r.id), explain)]
+    scored = dict(zip((r.id for r in to_score), score_resumes(jd, jd_vec, jd_skills, to_score, explain)))
+
+    results = [scored[r.id] if r.id in scored else _cached_result(cached[r.id]) for r in resumes]
+    matches = [match_values(jd, r, scored[r.id], explain) for r in to_score]
+    return results, matches
+
+
+def iter_ready_resumes(
+    db: Session, chunk_size: int, after_id: int = 0, criteria: Sequence = ()
+) -> Iterator[List[Resume]]:
+    """
+    Yield ready resumes with id > after_id (and matching ``criteria``) in id order, one
+    chunk at a time, using keyset pagination on id. DEFERRED_RESUME_COLUMNS are not
+    loaded; use ``load_deferred`` for the rows that need them. Callers should commit per
+    chunk so processed rows can be garbage collected.
+    """
+    last_id = after_id
+    while True:
+        chunk = (
+            db.query(Resume)
+            .options(*(defer(column) for column in DEFERRED_RESUME_COLUMNS))
+            .filter(Resume.status == STATUS_READY, Resume.id > last_id, *criteria)
+            .order_by(Resume.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1].id  # read before the caller's commit expires the row
+        yield chunk
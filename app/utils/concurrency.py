@@ -0,0 +1,90 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache, partial
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Threads that run blocking route work (SQLAlchemy session, features backfill) off the event loop
+DB_THREADS = int(os.getenv("DB_THREADS", "16"))
+# Model calls allowed to run at once; the encoder already uses several cores per call
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "2"))
+# Budget for the model work of one request, queueing for the inference executor included
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "60"))
+# Budget for whole-pool scoring (/results/bulk, /results/matrix), whose work grows with the
+# number of resumes; 0 means no deadline. Runs too long for one request belong in /results/jobs
+BULK_TIMEOUT_SECONDS = float(os.getenv("BULK_TIMEOUT_SECONDS", "0")) or None
+
+# Monotonic deadline of the request being served on this thread; None for background work
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class InferenceTimeout(TimeoutError):
+    """Model work for a request did not finish before its deadline."""
+
+
+@lru_cache(maxsize=1)
+def get_db_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+
+
+@lru_cache(maxsize=1)
+def get_inference_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=INFERENCE_CONCURRENCY, thread_name_prefix="inference")
+
+
+def current_deadline() -> Optional[float]:
+    """Monotonic deadline of the request this thread is serving, or None."""
+    return _deadline.get()
+
+
+def _run_with_deadline(deadline: Optional[float], fn: Callable[..., T], *args, **kwargs) -> T:
+    _deadline.set(deadline)
+    return fn(*args, **kwargs)
+
+
+async def run_sync(fn: Callable[..., T], *args, timeout: Optional[float] = REQUEST_TIMEOUT_SECONDS, **kwargs) -> T:
+    """
+    Await blocking work (DB session, feature backfill) on the DB executor.
+
+    Model calls made by ``fn`` inherit a deadline ``timeout`` seconds from now and raise
+    InferenceTimeout once it passes. The DB work itself is not interrupted, so the
+    request-scoped session is never used by two threads at once.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    context = contextvars.copy_context()
+    call = partial(context.run, _run_with_deadline, deadline, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_db_executor(), call)
+
+
+def run_inference(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking model call on the inference executor and wait for its result.
+
+    Bounded by the caller's request deadline, if any: a call still queued when the
+    deadline passes is skipped instead of run, and the caller stops waiting at the
+    deadline. Background work (ingest, match jobs) has no deadline.
+    """
+    deadline = current_deadline()
+
+    def task() -> T:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise InferenceTimeout("Request deadline passed while waiting for the model")
+        return fn(*args, **kwargs)
+
+    future = get_inference_executor().submit(task)
+    timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise InferenceTimeout("Model inference did not finish before the request deadline")
+
+
+def shutdown_executors() -> None:
+    get_db_executor().shutdown(wait=False, cancel_futures=True)
+    get_inference_executor().shutdown(wait=False, cancel_futures=True)
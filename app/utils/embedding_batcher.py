@@ -0,0 +1,182 @@
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.concurrency import INFERENCE_CONCURRENCY, InferenceTimeout, current_deadline, get_inference_executor
+
+# Upper bounds on the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class _EmbedRequest:
+    __slots__ = ("texts", "future", "deadline", "enqueued_at")
+
+    def __init__(self, texts: List[str], deadline: Optional[float]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+
+
+def _resolve(future: Future, result=None, error: Optional[BaseException] = None) -> None:
+    # The caller may have given up (cancelled) at its deadline in the meantime
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent small encode calls into larger model batches.
+
+    Callers block in ``embed`` while a scheduler thread drains the queue: it takes a free
+    inference slot, waits until ``max_batch_size`` texts are queued or the oldest request
+    has waited ``max_wait_ms``, encodes everything as one batch on the inference executor
+    and slices the result back to each caller. While every slot is busy requests keep
+    queueing, so batches grow with load. A request is never split across batches.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int,
+        max_wait_ms: float,
+        slots: int = INFERENCE_CONCURRENCY,
+    ):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._slots = threading.Semaphore(slots)
+        self._queue: Deque[_EmbedRequest] = deque()
+        self._queued_texts = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # Metrics, read by stats()
+        self._requests = 0
+        self._texts = 0
+        self._batches = 0
+        self._batched_texts = 0
+        self._served = 0
+        self._expired = 0
+        self._wait_seconds = 0.0
+        self._batch_sizes = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._cond:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        self._ensure_started()
+        request = _EmbedRequest(list(texts), current_deadline())
+        with self._cond:
+            self._queue.append(request)
+            self._queued_texts += len(request.texts)
+            self._requests += 1
+            self._texts += len(request.texts)
+            self._cond.notify()
+        timeout = max(0.0, request.deadline - time.monotonic()) if request.deadline is not None else None
+        try:
+            return request.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            request.future.cancel()
+            raise InferenceTimeout("Model inference did not finish before the request deadline")
+
+    def _next_batch(self) -> List[_EmbedRequest]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            flush_at = self._queue[0].enqueued_at + self.max_wait
+            while self._queued_texts < self.max_batch_size:
+                remaining = flush_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch: List[_EmbedRequest] = []
+            size = 0
+            while self._queue and (not batch or size + len(self._queue[0].texts) <= self.max_batch_size):
+                request = self._queue.popleft()
+                batch.append(request)
+                size += len(request.texts)
+            self._queued_texts -= size
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            self._slots.acquire()
+            try:
+                batch = self._next_batch()
+                now = time.monotonic()
+                live = []
+                for request in batch:
+                    if request.future.cancelled():
+                        continue
+                    if request.deadline is not None and now >= request.deadline:
+                        self._expired += 1
+                        error = InferenceTimeout("Request deadline passed while waiting for the model")
+                        _resolve(request.future, error=error)
+                        continue
+                    self._served += 1
+                    self._wait_seconds += now - request.enqueued_at
+                    live.append(request)
+                if not live:
+                    self._slots.release()
+                    continue
+                texts = [text for request in live for text in request.texts]
+                self._record_batch(len(texts))
+                future = get_inference_executor().submit(self.encode, texts)
+                future.add_done_callback(lambda f, live=live: self._fan_out(f, live))
+            except Exception:
+                print("Embedding batcher failed:", traceback.format_exc())
+                self._slots.release()
+
+    def _fan_out(self, future: Future, batch: List[_EmbedRequest]) -> None:
+        self._slots.release()
+        error = future.exception()
+        offset = 0
+        for request in batch:
+            if error is not None:
+                _resolve(request.future, error=error)
+            else:
+                _resolve(request.future, result=future.result()[offset : offset + len(request.texts)])
+            offset += len(request.texts)
+
+    def _record_batch(self, size: int) -> None:
+        self._batches += 1
+        self._batched_texts += size
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self._batch_sizes[i] += 1
+                return
+        self._batch_sizes[-1] += 1
+
+    def stats(self) -> Dict:
+        with self._cond:
+            queue_requests, queue_texts = len(self._queue), self._queued_texts
+        return {
+            "queue_depth_requests": queue_requests,
+            "queue_depth_texts": queue_texts,
+            "requests_total": self._requests,
+            "texts_total": self._texts,
+            "batches_total": self._batches,
+            "expired_total": self._expired,
+            "mean_batch_size": round(self._batched_texts / self._batches, 2) if self._batches else 0.0,
+            "mean_queue_wait_ms": round(1000 * self._wait_seconds / self._served, 3) if self._served else 0.0,
+            "batch_size_histogram": {
+                **{f"le_{bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, self._batch_sizes)},
+                "gt_" + str(BATCH_SIZE_BUCKETS[-1]): self._batch_sizes[-1],
+            },
+        }
@@ -0,0 +1,245 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Tier 1: per-process LRU, bounded by the bytes of the vectors it holds (0 disables it)
+EMBED_CACHE_BYTES = int(os.getenv("EMBED_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Tier 2: memory-mapped float16 store shared by every worker process (empty disables it)
+EMBED_DISK_CACHE_DIR = os.getenv("EMBED_DISK_CACHE_DIR", "")
+EMBED_DISK_CACHE_ROWS = int(os.getenv("EMBED_DISK_CACHE_ROWS", "500000"))
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def key_tag(key: str) -> np.uint64:
+    """First 8 bytes of a text_key, stored with its disk cache row to validate reads."""
+    return np.uint64(int(key[:16], 16))
+
+
+class EmbeddingLRU:
+    """In-process LRU of text vectors keyed by sha1(text), evicting past ``max_bytes``."""
+
+    def __init__(self, max_bytes: int = EMBED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vec = self._data.get(key)
+                if vec is not None:
+                    self._data.move_to_end(key)
+                    found[key] = vec
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vec in items.items():
+                if key in self._data:
+                    continue
+                self._data[key] = vec
+                self.bytes += vec.nbytes
+            while self.bytes > self.max_bytes and self._data:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted.nbytes
+
+
+class DiskEmbeddingCache:
+    """
+    Text vectors shared across worker processes through the page cache.
+
+    Vectors live in a fixed-size float16 ``np.memmap`` (``rows`` x dim) used as a ring;
+    a SQLite file maps sha1(text) to its row. Writers serialize on an IMMEDIATE
+    transaction: the vectors are written and flushed before their keys are committed,
+    so a reader never sees a key whose row is incomplete. When the ring wraps, the keys
+    of the overwritten rows are dropped in the same transaction. A reader may still hold a
+    row it looked up just before that, so each row also carries a tag (the first 8 bytes of
+    its key's sha1) in a parallel memmap: a writer clears the tag before rewriting the row
+    and sets it after, and a reader keeps a vector only if the tag matches its key both
+    before and after the copy. The dimension and row count are fixed by the first write
+    and kept in the index.
+    """
+
+    def __init__(self, directory: str, model_id: str, rows: int = EMBED_DISK_CACHE_ROWS):
+        # One store per model: vectors from different models must never mix
+        self.directory = os.path.join(directory, hashlib.sha1(model_id.encode()).hexdigest()[:12])
+        self.rows = rows
+        self.dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._tags: Optional[np.memmap] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_row ON entries (row)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _open(self, conn: sqlite3.Connection, dim: Optional[int] = None) -> Optional[np.memmap]:
+        """Open the stored memmap, or create it for ``dim`` (caller holds the write lock)."""
+        with self._lock:
+            if self._vectors is None:
+                stored_dim, stored_rows = self._meta(conn, "dim"), self._meta(conn, "rows")
+                path = os.path.join(self.directory, "vectors.f16")
+                if stored_dim is not None:
+                    self._vectors = np.memmap(path, dtype=np.float16, mode="r+", shape=(stored_rows, stored_dim))
+                    self.dim, self.rows = stored_dim, stored_rows
+                    self._tags = self._open_tags()
+                elif dim is not None:
+                    self._vectors = np.memmap(path, dtype=np.float16, mode="w+", shape=(self.rows, dim))
+                    self.dim = dim
+                    self._tags = self._open_tags()
+                    conn.executemany(
+                        "INSERT INTO meta (name, value) VALUES (?, ?)", [("dim", dim), ("rows", self.rows)]
+                    )
+        return self._vectors
+
+    def _open_tags(self) -> np.memmap:
+        # Created zeroed (no row valid) next to a store written before tags existed; opening
+        # in append mode never truncates what another process has written
+        path = os.path.join(self.directory, "tags.u64")
+        with open(path, "ab") as fh:
+            if fh.tell() < self.rows * 8:
+                fh.truncate(self.rows * 8)
+        return np.memmap(path, dtype=np.uint64, mode="r+", shape=(self.rows,))
+
+    def _meta(self, conn: sqlite3.Connection, name: str) -> Optional[int]:
+        row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _known_keys(self, conn: sqlite3.Connection, keys: List[str]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(conn.execute(f"SELECT key, row FROM entries WHERE key IN ({placeholders})", chunk).fetchall())
+        return rows
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        conn = self._conn()
+        if self._open(conn) is None:  # nothing stored yet
+            return {}
+        found: Dict[str, np.ndarray] = {}
+        for key, row in self._known_keys(conn, list(keys)).items():
+            tag = key_tag(key)
+            if self._tags[row] != tag:
+                continue
+            vec = np.array(self._vectors[row], dtype=np.float32)
+            if self._tags[row] == tag:  # not rewritten for another key during the copy
+                found[key] = vec
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        dim = len(next(iter(items.values())))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")  # also serializes creating the memmap file
+        try:
+            vectors = self._open(conn, dim)
+            if self.dim != dim:
+                conn.execute("ROLLBACK")
+                return
+            items = dict(list(items.items())[-self.rows :])  # never wrap onto rows written by this call
+            known = self._known_keys(conn, list(items))
+            new = [key for key in items if key not in known]
+            next_row = self._meta(conn, "next_row") or 0
+            assigned = [(next_row + i) % self.rows for i in range(len(new))]
+            tags = self._tags
+            tags[assigned] = 0
+            for key, slot in zip(new, assigned):
+                vectors[slot] = items[key]
+            tags[assigned] = [key_tag(key) for key in new]
+            vectors.flush()
+            tags.flush()
+            conn.executemany("DELETE FROM entries WHERE row = ?", [(slot,) for slot in assigned])
+            conn.executemany("INSERT INTO entries (key, row) VALUES (?, ?)", list(zip(new, assigned)))
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('next_row', ?)",
+                ((next_row + len(new)) % self.rows,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache in front of the encoder, keyed by (model_id, sha1(text)).
+
+    ``embed`` answers from the in-process LRU, then the shared disk store, and sends only
+    the remaining distinct texts to ``compute`` in one call. Counters feed ``stats``.
+    """
+
+    def __init__(self, model_id: str, memory: Optional[EmbeddingLRU], disk: Optional[DiskEmbeddingCache]):
+        self.model_id = model_id
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def embed(self, texts: Sequence[str], compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        keys = [text_key(text) for text in texts]
+        distinct = list(dict.fromkeys(keys))
+        found = self.memory.get_many(distinct) if self.memory is not None else {}
+        memory_hits = len(found)
+        from_disk: Dict[str, np.ndarray] = {}
+        if self.disk is not None and len(found) < len(distinct):
+            try:
+                from_disk = self.disk.get_many([key for key in distinct if key not in found])
+            except Exception as e:
+                print("Embedding disk cache read failed:", str(e))
+            found.update(from_disk)
+
+        missing = [key for key in distinct if key not in found]
+        computed: Dict[str, np.ndarray] = {}
+        if missing:
+            text_of = dict(zip(keys, texts))
+            vectors = compute([text_of[key] for key in missing])
+            computed = {key: np.asarray(vec, dtype=np.float32) for key, vec in zip(missing, vectors)}
+            found.update(computed)
+            if self.disk is not None:
+                try:
+                    self.disk.put_many(computed)
+                except Exception as e:
+                    print("Embedding disk cache write failed:", str(e))
+        if self.memory is not None:
+            self.memory.put_many({**from_disk, **computed})
+
+        self.memory_hits += memory_hits
+        self.disk_hits += len(from_disk)
+        self.misses += len(missing)
+        return np.stack([found[key] for key in keys])
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "model_id": self.model_id,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_bytes": self.memory.bytes if self.memory is not None else 0,
+            "disk_enabled": self.disk is not None,
+        }
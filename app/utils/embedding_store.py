@@ -0,0 +1,236 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.utils.embeddings import EMBEDDING_MODEL_VERSION
+
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "data/embedding_store")
+# "float16" (2 bytes per value) or "int8" (1 byte per value plus a per-row scale)
+EMBEDDING_STORE_DTYPE = os.getenv("EMBEDDING_STORE_DTYPE", "float16").lower()
+# Compaction rewrites the store once this share of its rows is dead (deleted or superseded)
+EMBEDDING_STORE_COMPACT_RATIO = float(os.getenv("EMBEDDING_STORE_COMPACT_RATIO", "0.2"))
+EMBEDDING_STORE_COMPACT_SECONDS = float(os.getenv("EMBEDDING_STORE_COMPACT_SECONDS", "3600"))
+_COMPACT_CHUNK_ROWS = 65536
+
+
+def _row_dtype(dtype: str, dim: int) -> np.dtype:
+    if dtype == "int8":
+        return np.dtype([("scale", "<f4"), ("v", "i1", (dim,))])
+    if dtype == "float16":
+        return np.dtype([("v", "<f2", (dim,))])
+    raise ValueError(f"Unknown EMBEDDING_STORE_DTYPE {dtype!r}; expected 'float16' or 'int8'")
+
+
+class ResumeEmbeddingStore:
+    """
+    Append-only on-disk matrix of resume vectors, shared by every worker process.
+
+    Rows live in ``vectors.<generation>.bin`` (float16, or int8 with a per-row scale)
+    and the resume id of each row in ``ids.<generation>.bin``. Readers map the vectors
+    read-only with ``np.memmap``, so all workers share one copy in the page cache, and
+    keep only an int32 id -> row table in their heap. Writers append under an exclusive
+    file lock: vector bytes first, then the ids, so the ids file length is the number of
+    complete rows. Re-appending an id supersedes its earlier row; ``compact`` rewrites
+    live rows into the next generation and swaps ``CURRENT`` atomically. There is one
+    store per embedding model version and dtype.
+    """
+
+    def __init__(self, directory: str = EMBEDDING_STORE_DIR, dtype: str = EMBEDDING_STORE_DTYPE):
+        model_key = hashlib.sha1(EMBEDDING_MODEL_VERSION.encode()).hexdigest()[:12]
+        self.directory = os.path.join(directory, f"{model_key}-{dtype}")
+        self.dtype = dtype
+        _row_dtype(dtype, 1)  # fail fast on an unknown dtype
+        self.dim: Optional[int] = None
+        self._lock = threading.Lock()
+        self._reset(generation=None)
+
+    def _reset(self, generation: Optional[int]) -> None:
+        self._generation = generation
+        self._rows = 0
+        self._vectors: Optional[np.memmap] = None
+        self._row_of = np.full(0, -1, dtype=np.int32)
+
+    # --- files ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _vectors_path(self, generation: int) -> str:
+        return self._path(f"vectors.{generation}.bin")
+
+    def _ids_path(self, generation: int) -> str:
+        return self._path(f"ids.{generation}.bin")
+
+    def _read_generation(self) -> Optional[int]:
+        try:
+            with open(self._path("CURRENT")) as fh:
+                return int(fh.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write_generation(self, generation: int) -> None:
+        tmp = self._path("CURRENT.tmp")
+        with open(tmp, "w") as fh:
+            fh.write(str(generation))
+        os.replace(tmp, self._path("CURRENT"))
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self._path("lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _load_dim(self) -> Optional[int]:
+        if self.dim is None:
+            try:
+                with open(self._path("meta.json")) as fh:
+                    self.dim = int(json.load(fh)["dim"])
+            except (OSError, ValueError, KeyError):
+                return None
+        return self.dim
+
+    # --- reading ---
+    def _refresh_locked(self) -> None:
+        """Pick up rows appended (or a compaction done) by any process since the last call."""
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._reset(generation)
+        if generation is None or self._load_dim() is None:
+            return
+        try:
+            rows = os.path.getsize(self._ids_path(generation)) // 8
+        except FileNotFoundError:  # compacted away between reading CURRENT and now
+            self._reset(None)
+            return
+        if rows <= self._rows:
+            return
+        new_ids = np.fromfile(self._ids_path(generation), dtype=np.int64, count=rows - self._rows, offset=8 * self._rows)
+        # The last row written for an id wins
+        reversed_ids = new_ids[::-1]
+        unique_ids, last = np.unique(reversed_ids, return_index=True)
+        if unique_ids[-1] >= len(self._row_of):
+            grown = np.full(int(unique_ids[-1]) + 1, -1, dtype=np.int32)
+            grown[: len(self._row_of)] = self._row_of
+            self._row_of = grown
+        self._row_of[unique_ids] = self._rows + (len(new_ids) - 1 - last)
+        self._vectors = np.memmap(
+            self._vectors_path(generation), dtype=_row_dtype(self.dtype, self.dim), mode="r", shape=(rows,)
+        )
+        self._rows = rows
+
+    def get_many(self, resume_ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return ``(vectors, found)`` for ``resume_ids``: a float32 (n, dim) matrix, with zero
+        rows where ``found`` (a bool mask) is False.
+        """
+        ids = np.asarray(list(resume_ids), dtype=np.int64)
+        with self._lock:
+            self._refresh_locked()
+            vectors, row_of = self._vectors, self._row_of
+        if vectors is None or len(ids) == 0:
+            return np.zeros((len(ids), self.dim or 0), dtype=np.float32), np.zeros(len(ids), dtype=bool)
+        in_range = (ids >= 0) & (ids < len(row_of))
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        rows[in_range] = row_of[ids[in_range]]
+        found = rows >= 0
+        out = np.zeros((len(ids), self.dim), dtype=np.float32)
+        out[found] = self._decode(vectors[rows[found]])
+        return out, found
+
+    def _decode(self, records: np.ndarray) -> np.ndarray:
+        values = records["v"].astype(np.float32)
+        if self.dtype == "int8":
+            values *= records["scale"][:, None]
+        return values
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        records = np.zeros(len(vectors), dtype=_row_dtype(self.dtype, vectors.shape[1]))
+        if self.dtype == "int8":
+            scale = np.abs(vectors).max(axis=1) / 127.0
+            scale[scale == 0] = 1.0
+            records["scale"] = scale
+            records["v"] = np.rint(vectors / scale[:, None])
+        else:
+            records["v"] = vectors
+        return records
+
+    # --- writing ---
+    def append_many(self, resume_ids: Iterable[int], vectors: np.ndarray) -> None:
+        resume_ids = np.asarray([int(i) for i in resume_ids], dtype=np.int64)
+        if len(resume_ids) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(resume_ids), -1)
+        with self._write_lock():
+            generation = self._read_generation()
+            if generation is None:
+                with open(self._path("meta.json"), "w") as fh:
+                    json.dump({"model": EMBEDDING_MODEL_VERSION, "dtype": self.dtype, "dim": vectors.shape[1]}, fh)
+                self.dim = vectors.shape[1]
+                generation = 0
+                open(self._ids_path(generation), "ab").close()
+                self._write_generation(generation)
+            if self._load_dim() != vectors.shape[1]:
+                raise ValueError(f"Embedding store holds {self.dim}-d vectors, got {vectors.shape[1]}-d")
+            records = self._encode(vectors)
+            rows = os.path.getsize(self._ids_path(generation)) // 8
+            with open(self._vectors_path(generation), "ab") as fh:
+                fh.truncate(rows * records.dtype.itemsize)  # drop a torn append from a crashed writer
+                fh.write(records.tobytes())
+            with open(self._ids_path(generation), "ab") as fh:
+                fh.truncate(rows * 8)
+                fh.write(resume_ids.tobytes())
+            self._refresh_locked()
+
+    def compact(self, live_ids: Iterable[int], min_dead_ratio: float = EMBEDDING_STORE_COMPACT_RATIO) -> int:
+        """
+        Rewrite the store keeping only the latest row of each id in ``live_ids``, once at
+        least ``min_dead_ratio`` of its rows are dead. Returns the number of rows dropped.
+        """
+        live = np.unique(np.asarray(list(live_ids), dtype=np.int64))
+        with self._write_lock():
+            self._refresh_locked()
+            if self._vectors is None:
+                return 0
+            live = live[(live >= 0) & (live < len(self._row_of))]
+            rows = self._row_of[live].astype(np.int64)
+            kept_ids, rows = live[rows >= 0], rows[rows >= 0]
+            dropped = self._rows - len(rows)
+            if dropped == 0 or dropped < min_dead_ratio * self._rows:
+                return 0
+
+            old, new = self._generation, self._generation + 1
+            with open(self._vectors_path(new), "wb") as fh:
+                for start in range(0, len(rows), _COMPACT_CHUNK_ROWS):
+                    fh.write(self._vectors[rows[start : start + _COMPACT_CHUNK_ROWS]].tobytes())
+            with open(self._ids_path(new), "wb") as fh:
+                fh.write(kept_ids.tobytes())
+            self._write_generation(new)
+            # Readers still mapping the old generation keep their pages until they refresh
+            for path in (self._vectors_path(old), self._ids_path(old)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._refresh_locked()
+            return dropped
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh_locked()
+            live = int(np.count_nonzero(self._row_of >= 0))
+            return {"dtype": self.dtype, "dim": self.dim, "rows": self._rows, "live_rows": live, "dead_rows": self._rows - live}
+
+
+@lru_cache(maxsize=1)
+def get_resume_embedding_store() -> ResumeEmbeddingStore:
+    return ResumeEmbeddingStore()
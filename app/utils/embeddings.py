@@ -1,26 +1,203 @@
-from functools import lru_cache
-from typing import List
+import json
+import os
+import threading
+from functools import lru_cache, partial
+from typing import List, Optional
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from app.utils.concurrency import run_inference
+from app.utils.metrics import observe_encode_batch, timed
+from app.utils.embedding_batcher import EmbeddingBatcher
+from app.utils.embedding_cache import (
+    EMBED_CACHE_BYTES,
+    EMBED_DISK_CACHE_DIR,
+    DiskEmbeddingCache,
+    EmbeddingCache,
+    EmbeddingLRU,
+)
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+# "torch" runs the SentenceTransformer model; "onnx" runs a graph exported by
+# export_onnx_model.py on ONNX Runtime (no torch import, smaller footprint on CPU)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", f"models/{EMBEDDING_MODEL_NAME}-onnx")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "false").lower() in ("1", "true", "yes")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0: let ONNX Runtime decide
+# Stored document vectors are tagged with this version; bump it (or change the model)
+# to mark every persisted embedding as stale. int8 weights shift vectors slightly, so
+# the quantized backend gets its own version; fp32 ONNX matches PyTorch.
+EMBEDDING_MODEL_VERSION = os.getenv(
+    "EMBEDDING_MODEL_VERSION",
+    f"{EMBEDDING_MODEL_NAME}:int8" if EMBEDDING_BACKEND == "onnx" and ONNX_QUANTIZED else EMBEDDING_MODEL_NAME,
+)
+EMBEDDING_DTYPE = np.float32
+# Micro-batching of concurrent small encode calls (see app.utils.embedding_batcher)
+EMBED_MICROBATCHING = os.getenv("EMBED_MICROBATCHING", "true").lower() in ("1", "true", "yes")
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "128"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+
+class TorchEncoder:
+    """The SentenceTransformer model in PyTorch fp32."""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        embeddings = self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+
+
+class OnnxEncoder:
+    """
+    The same encoder exported to ONNX (optionally int8-quantized) on ONNX Runtime.
+
+    Reproduces the SentenceTransformer pipeline: tokenize with truncation to the model's
+    max_seq_length, run the transformer graph, mean-pool over the attention mask and
+    L2-normalize. Texts are batched by length to keep padding low.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = ONNX_QUANTIZED):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, "encoder_config.json")) as f:
+            config = json.load(f)
+        self.dim = config["dimension"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+
+        options = ort.SessionOptions()
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        filename = "model_quantized.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, filename), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]  # (batch, tokens, dim)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=EMBEDDING_DTYPE)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            idx = order[start : start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+        return out
+
+
+ENCODER_BACKENDS = {"torch": TorchEncoder, "onnx": OnnxEncoder}
+_ENCODER_LOCK = threading.Lock()
 
 
 @lru_cache(maxsize=1)
-def get_model() -> SentenceTransformer:
-    return SentenceTransformer("all-MiniLM-L6-v2")
+def _load_encoder():
+    if EMBEDDING_BACKEND not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {EMBEDDING_BACKEND!r}; expected one of {sorted(ENCODER_BACKENDS)}")
+    return ENCODER_BACKENDS[EMBEDDING_BACKEND]()
+
+
+def get_encoder():
+    """The configured encoder (EMBEDDING_BACKEND), loaded once per process."""
+    with _ENCODER_LOCK:  # requests arriving during the startup warm-up wait for that load
+        return _load_encoder()
 
 
-def embed_texts(texts: List[str]) -> np.ndarray:
-    model = get_model()
-    embeddings = model.encode(texts, normalize_embeddings=True)
-    return np.array(embeddings)
+@timed("encode")
+def _encode(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    encoder = get_encoder()
+    observe_encode_batch(encoder.backend, len(texts))
+    return encoder.encode(texts, batch_size)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> EmbeddingBatcher:
+    return EmbeddingBatcher(
+        partial(_encode, batch_size=EMBED_BATCH_MAX_SIZE), EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_MS
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Text-vector cache for EMBEDDING_MODEL_VERSION, or None when both tiers are disabled."""
+    memory = EmbeddingLRU() if EMBED_CACHE_BYTES > 0 else None
+    disk = DiskEmbeddingCache(EMBED_DISK_CACHE_DIR, EMBEDDING_MODEL_VERSION) if EMBED_DISK_CACHE_DIR else None
+    if memory is None and disk is None:
+        return None
+    return EmbeddingCache(EMBEDDING_MODEL_VERSION, memory, disk)
+
+
+@timed("embed_texts")
+def embed_texts(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    # Repeated texts (section headers, boilerplate sentences, skill names, re-uploads)
+    # are answered from the cache; only the distinct misses reach the model.
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return _embed_uncached(texts, batch_size)
+    return cache.embed(texts, lambda missing: _embed_uncached(missing, batch_size))
+
+
+def _embed_uncached(texts: List[str], batch_size: int) -> np.ndarray:
+    # Runs on the inference executor: bounded concurrency, and the request deadline applies.
+    # Small calls are coalesced with concurrent ones; large ones are already a full batch.
+    if EMBED_MICROBATCHING and 0 < len(texts) < EMBED_BATCH_MAX_SIZE:
+        return get_embedding_batcher().embed(texts)
+    return run_inference(_encode, texts, batch_size)
 
 
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b))
 
 
-def similarity_score_0_100(a: np.ndarray, b: np.ndarray) -> int:
-    sim = cosine_similarity(a, b)
+def similarity_to_score_0_100(sim: float) -> int:
     sim = max(-1.0, min(1.0, sim))
-    return int(round((sim + 1.0) * 50)) 
\ No newline at end of file
+    return int(round((sim + 1.0) * 50))
+
+
+def similarity_score_0_100(a: np.ndarray, b: np.ndarray) -> int:
+    return similarity_to_score_0_100(cosine_similarity(a, b))
+
+
+def similarity_scores_0_100(matrix: np.ndarray, vec: np.ndarray) -> np.ndarray:
+    """Vectorized similarity_score_0_100 of every row of ``matrix`` against ``vec``."""
+    sims = np.clip(np.asarray(matrix, dtype=np.float64) @ np.asarray(vec, dtype=np.float64), -1.0, 1.0)
+    return np.rint((sims + 1.0) * 50).astype(int)
+
+
+def similarity_matrix_0_100(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """similarity_score_0_100 of every row of ``a`` against every row of ``b``, shape (len(a), len(b))."""
+    sims = np.clip(np.asarray(a, dtype=np.float64) @ np.asarray(b, dtype=np.float64).T, -1.0, 1.0)
+    return np.rint((sims + 1.0) * 50).astype(int)
+
+
+def vector_to_bytes(vec: np.ndarray) -> bytes:
+    return np.asarray(vec, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def vector_from_bytes(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+def is_embedding_stale(blob: Optional[bytes], model_version: Optional[str]) -> bool:
+    return not blob or model_version != EMBEDDING_MODEL_VERSION
@@ -0,0 +1,95 @@
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.utils.embeddings import (
+    EMBEDDING_MODEL_VERSION,
+    embed_texts,
+    is_embedding_stale,
+    vector_from_bytes,
+    vector_to_bytes,
+)
+from app.utils.nlp import SKILL_VOCABULARY_VERSION, extract_skills
+from app.utils.scoring import ENCODE_BATCH_SIZE, MAX_EXPLANATION_SENTENCES, SCORING_VERSION, split_sentences_many
+
+# Skills depend on the vocabulary, sentence vectors on the model: either change invalidates both
+FEATURES_VERSION = f"{SKILL_VOCABULARY_VERSION}:{EMBEDDING_MODEL_VERSION}"
+# Stamped on Match rows; a stored match is reusable only if produced under the same stamp
+SCORER_VERSION = f"{FEATURES_VERSION}:{SCORING_VERSION}"
+
+
+class ResumeFeatures(NamedTuple):
+    skills: List[str]
+    sentences: List[str]
+    sentence_vecs: Optional[np.ndarray]
+
+
+def _text_of(row) -> str:
+    # Resume rows carry text_content, JobDescription rows carry description_text
+    text = getattr(row, "text_content", None)
+    if text is None:
+        text = getattr(row, "description_text", None)
+    return text or ""
+
+
+def set_document_embedding(row, vec: np.ndarray) -> None:
+    row.embedding = vector_to_bytes(vec)
+    row.embedding_model = EMBEDDING_MODEL_VERSION
+
+
+def ensure_document_embeddings(rows: Sequence) -> List[np.ndarray]:
+    """
+    Return the stored document vector for every row, (re)computing only the ones that are
+    missing or were produced by a different model version. Recomputed rows are updated in
+    place; the caller is responsible for committing the session.
+    """
+    stale = [row for row in rows if is_embedding_stale(row.embedding, row.embedding_model)]
+    if stale:
+        vectors = embed_texts([_text_of(row) for row in stale])
+        for row, vec in zip(stale, vectors):
+            set_document_embedding(row, vec)
+    return [vector_from_bytes(row.embedding) for row in rows]
+
+
+def ensure_document_embedding(row) -> np.ndarray:
+    return ensure_document_embeddings([row])[0]
+
+
+def _sentence_vecs(row) -> Optional[np.ndarray]:
+    vecs = vector_from_bytes(row.sentence_embeddings)
+    if vecs is None:
+        return None
+    return vecs.reshape(len(row.sentences), -1)
+
+
+def ensure_resume_features(rows: Sequence) -> List[ResumeFeatures]:
+    """
+    Return skills, explanation sentences and sentence vectors for every resume row.
+
+    Rows whose persisted features are missing or carry another FEATURES_VERSION are
+    recomputed (one encode call for all of their sentences) and updated in place; the
+    caller commits.
+    """
+    stale = [row for row in rows if row.features_version != FEATURES_VERSION]
+    if stale:
+        texts = [_text_of(row) for row in stale]
+        sentence_lists = [sentences[:MAX_EXPLANATION_SENTENCES] for sentences in split_sentences_many(texts)]
+        flat = [sentence for sentences in sentence_lists for sentence in sentences]
+        flat_vecs = embed_texts(flat, batch_size=ENCODE_BATCH_SIZE) if flat else None
+        offset = 0
+        for row, text, sentences in zip(stale, texts, sentence_lists):
+            row.skill_list = extract_skills(text)
+            row.sentences = sentences
+            row.sentence_embeddings = (
+                vector_to_bytes(flat_vecs[offset : offset + len(sentences)]) if sentences else None
+            )
+            row.features_version = FEATURES_VERSION
+            offset += len(sentences)
+    return [ResumeFeatures(row.skill_list or [], row.sentences or [], _sentence_vecs(row)) for row in rows]
+
+
+def ensure_jd_skills(jd) -> List[str]:
+    if jd.features_version != FEATURES_VERSION:
+        jd.skill_list = extract_skills(_text_of(jd))
+        jd.features_version = FEATURES_VERSION
+    return jd.skill_list or []
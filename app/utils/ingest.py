@@ -0,0 +1,182 @@
+import os
+import threading
+from datetime import datetime, timezone
+import time
+import traceback
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from app.models.database import SessionLocal
+from app.models.entities import Resume
+from app.utils.features import ensure_document_embedding, ensure_resume_features
+from app.utils.ingest_queue import IngestJob, IngestQueue, get_ingest_queue
+from app.utils.metrics import count_documents, stage
+from app.utils.nlp import extract_fields, extract_fields_many
+from app.utils.parsers import PARSER_PROCESSES, extract_text_in_pool, get_parse_pool
+from app.utils.s3_client import upload_fileobj
+from app.utils.embedding_store import get_resume_embedding_store
+from app.utils.vector_index import get_resume_index
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", str(PARSER_PROCESSES)))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "1.0"))
+
+# Resume.status values, in pipeline order
+STATUS_PENDING = "pending"
+STATUS_PARSING = "parsing"
+STATUS_UPLOADING = "uploading"
+STATUS_INDEXING = "indexing"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+def extract_upload_text(filename: str, content_type: Optional[str], contents: bytes) -> Tuple[str, str]:
+    """Text and parser used for an uploaded file, extracted on the parse pool. Blocking."""
+    text, used_parser = extract_text_in_pool(filename, content_type or "", contents)
+    if not text or not text.strip():
+        raise ValueError("Could not extract text from file")
+    return text, used_parser
+
+
+def parse_upload(filename: str, content_type: Optional[str], contents: bytes) -> Dict:
+    """
+    Extract text and candidate fields from an uploaded file on the parse pool.
+
+    Blocking; call from a worker thread. Returns the dict consumed by apply_parsed_document.
+    """
+    text, used_parser = extract_upload_text(filename, content_type, contents)
+    with stage("extract_fields"):  # runs in a pool process, so it is timed from here
+        fields = get_parse_pool().submit(extract_fields, text).result()
+    return {"text": text, "parser": used_parser, "fields": fields}
+
+
+def extract_fields_batch(texts: List[str]) -> List[Dict]:
+    """
+    ``extract_fields`` for a batch of texts: one chunk per parse-pool process, each running
+    NER over its headers in nlp.pipe batches. Blocking; call from a worker thread.
+    """
+    if not texts:
+        return []
+    pool = get_parse_pool()
+    size = -(-len(texts) // PARSER_PROCESSES)
+    with stage("extract_fields_batch"):
+        futures = [pool.submit(extract_fields_many, texts[i : i + size]) for i in range(0, len(texts), size)]
+        return [fields for future in futures for fields in future.result()]
+
+
+def apply_parsed_document(resume: Resume, parsed: Dict, s3_url: Optional[str]) -> None:
+    """Copy the output of ``parse_upload`` onto a Resume row."""
+    fields = parsed["fields"]
+    resume.content_type = resume.content_type or parsed["parser"]
+    resume.text_content = parsed["text"]
+    resume.candidate_name = fields.get("candidate_name")
+    resume.candidate_email = fields.get("candidate_email")
+    resume.skills = fields.get("skills")
+    resume.total_experience_years = fields.get("total_experience_years")
+    resume.s3_url = s3_url
+    resume.parser = parsed["parser"]
+    resume.updated_at = datetime.now(timezone.utc)
+
+
+def _set_status(resume_id: int, status: str, error: Optional[str] = None) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Resume).filter(Resume.id == resume_id).update({"status": status, "error": error})
+        db.commit()
+    finally:
+        db.close()
+
+
+class IngestWorker:
+    """
+    Drains the durable ingest queue.
+
+    Dispatcher threads claim jobs and hand the CPU-bound part (text extraction, spaCy,
+    skill extraction) to the parse process pool, so the API event loop never runs it. The S3
+    upload, embedding and DB write then happen on the dispatcher thread.
+    """
+
+    def __init__(self, queue: IngestQueue, concurrency: int = INGEST_CONCURRENCY):
+        self.queue = queue
+        self.concurrency = concurrency
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        self.queue.requeue_stale()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"ingest-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.queue.wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=30)
+        self._threads = []
+
+    def _run(self) -> None:
+        last_requeue = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except Exception:
+                print("Ingest queue claim failed:", traceback.format_exc())
+                job = None
+            if job is None:
+                self.queue.wakeup.wait(INGEST_POLL_SECONDS)
+                self.queue.wakeup.clear()
+                if time.monotonic() - last_requeue > 60:
+                    self.queue.requeue_stale()
+                    last_requeue = time.monotonic()
+                continue
+            self._process(job)
+
+    def _process(self, job: IngestJob) -> None:
+        try:
+            _set_status(job.resume_id, STATUS_PARSING)
+            parsed = parse_upload(job.filename, job.content_type, job.payload)
+
+            _set_status(job.resume_id, STATUS_UPLOADING)
+            s3_url = upload_fileobj(BytesIO(job.payload), job.filename, content_type=job.content_type, folder="resumes")
+
+            _set_status(job.resume_id, STATUS_INDEXING)
+            db = SessionLocal()
+            try:
+                resume = db.query(Resume).filter(Resume.id == job.resume_id).first()
+                if resume is None:  # deleted while queued
+                    self.queue.complete(job.id)
+                    return
+                apply_parsed_document(resume, parsed, s3_url)
+                vector = ensure_document_embedding(resume)
+                ensure_resume_features([resume])
+                resume.status = STATUS_READY
+                resume.error = None
+                db.commit()
+            finally:
+                db.close()
+        except Exception as e:
+            print("Ingest failed for resume", job.resume_id, traceback.format_exc())
+            retry = self.queue.fail(job, str(e))
+            _set_status(job.resume_id, STATUS_PENDING if retry else STATUS_FAILED, None if retry else str(e))
+            return
+
+        self.queue.complete(job.id)
+        count_documents("ingest")
+        try:
+            get_resume_index().add(job.resume_id, vector)
+        except Exception:
+            print("Vector index update failed:", traceback.format_exc())
+        try:
+            get_resume_embedding_store().append_many([job.resume_id], vector[None, :])
+        except Exception:
+            print("Embedding store update failed:", traceback.format_exc())
+
+
+@lru_cache(maxsize=1)
+def get_ingest_worker() -> IngestWorker:
+    return IngestWorker(get_ingest_queue())
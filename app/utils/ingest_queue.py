@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+INGEST_QUEUE_PATH = os.getenv("INGEST_QUEUE_PATH", "data/ingest_queue.sqlite3")
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+# A job still "running" after this long is assumed to belong to a dead process
+INGEST_STALE_SECONDS = int(os.getenv("INGEST_STALE_SECONDS", "600"))
+
+
+class IngestJob(NamedTuple):
+    id: int
+    resume_id: int
+    filename: str
+    content_type: Optional[str]
+    payload: bytes
+    attempts: int
+
+
+class IngestQueue:
+    """
+    Durable FIFO of uploaded files waiting to be parsed, backed by a local SQLite file.
+
+    Every API worker process opens the same file; ``claim`` takes a job inside an
+    IMMEDIATE transaction so two processes never pick up the same one. Jobs left
+    ``running`` by a crashed process are put back with ``requeue_stale``.
+    """
+
+    def __init__(self, path: str = INGEST_QUEUE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self.wakeup = threading.Event()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingest_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                resume_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                content_type TEXT,
+                payload BLOB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_ingest_jobs_status ON ingest_jobs (status, id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, resume_id: int, filename: str, content_type: Optional[str], payload: bytes) -> int:
+        cur = self._conn().execute(
+            "INSERT INTO ingest_jobs (resume_id, filename, content_type, payload, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (resume_id, filename, content_type, payload, time.time()),
+        )
+        self.wakeup.set()
+        return cur.lastrowid
+
+    def claim(self) -> Optional[IngestJob]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, resume_id, filename, content_type, payload, attempts FROM ingest_jobs "
+                "WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE ingest_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (time.time(), row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return IngestJob(row[0], row[1], row[2], row[3], row[4], row[5] + 1)
+
+    def complete(self, job_id: int) -> None:
+        # The payload is only needed until the file is processed
+        self._conn().execute("DELETE FROM ingest_jobs WHERE id = ?", (job_id,))
+
+    def fail(self, job: IngestJob, error: str) -> bool:
+        """Record a failed attempt; returns True if the job was requeued for another try."""
+        retry = job.attempts < INGEST_MAX_ATTEMPTS
+        self._conn().execute(
+            "UPDATE ingest_jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+            ("queued" if retry else "failed", error, time.time(), job.id),
+        )
+        return retry
+
+    def requeue_stale(self, older_than: float = INGEST_STALE_SECONDS) -> int:
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE ingest_jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND updated_at < ?",
+            (now, now - older_than),
+        )
+        return cur.rowcount
+
+    def depth(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM ingest_jobs WHERE status = 'queued'").fetchone()[0]
+
+    def position(self, resume_id: int) -> Optional[int]:
+        """Number of queued jobs ahead of this resume, or None if it is not queued."""
+        row = self._conn().execute(
+            "SELECT id FROM ingest_jobs WHERE resume_id = ? AND status = 'queued'", (resume_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM ingest_jobs WHERE status = 'queued' AND id < ?", (row[0],)
+        ).fetchone()[0]
+
+
+@lru_cache(maxsize=1)
+def get_ingest_queue() -> IngestQueue:
+    return IngestQueue()
@@ -0,0 +1,250 @@
+import heapq
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal
+from app.models.entities import JobDescription, MatchJob, Resume
+from app.utils.bulk_matching import (
+    as_utc,
+    compact_embedding_store,
+    iter_ready_resumes,
+    result_item,
+    score_incrementally,
+)
+from app.utils.embedding_store import EMBEDDING_STORE_COMPACT_SECONDS
+from app.utils.features import ensure_document_embedding, ensure_jd_skills
+from app.utils.ingest import STATUS_READY
+from app.utils.match_store import upsert_matches
+
+MATCH_JOB_WORKERS = int(os.getenv("MATCH_JOB_WORKERS", "2"))
+MATCH_JOB_CHUNK_SIZE = int(os.getenv("MATCH_JOB_CHUNK_SIZE", "256"))
+MATCH_JOB_POLL_SECONDS = float(os.getenv("MATCH_JOB_POLL_SECONDS", "2.0"))
+# A job "running" without a committed batch for this long is assumed to belong to a dead process
+MATCH_JOB_STALE_SECONDS = int(os.getenv("MATCH_JOB_STALE_SECONDS", "300"))
+
+# MatchJob.status values
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def create_match_job(db: Session, job_description_id: int, include_explanations: bool, force: bool, top_k: int) -> MatchJob:
+    job = MatchJob(
+        job_description_id=job_description_id,
+        status=JOB_QUEUED,
+        include_explanations=include_explanations,
+        force=force,
+        top_k=top_k,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    get_match_job_runner().wakeup.set()
+    return job
+
+
+def request_cancel(db: Session, job: MatchJob) -> None:
+    """Cancel a queued job at once; a running one stops before its next batch."""
+    # Conditional UPDATEs, like the runner's claim: a job claimed after it was loaded
+    # here gets the cancel flag instead of being marked cancelled under the runner
+    cancelled = (
+        db.query(MatchJob)
+        .filter(MatchJob.id == job.id, MatchJob.status == JOB_QUEUED)
+        .update({"status": JOB_CANCELLED, "finished_at": _now()}, synchronize_session=False)
+    )
+    if not cancelled:
+        db.query(MatchJob).filter(MatchJob.id == job.id, MatchJob.status == JOB_RUNNING).update(
+            {"cancel_requested": True}, synchronize_session=False
+        )
+    db.commit()
+
+
+def job_progress(job: MatchJob) -> Tuple[float, Optional[float]]:
+    """Percent done and estimated seconds remaining (None until a batch has been committed)."""
+    if job.status == JOB_COMPLETED:
+        return 100.0, 0.0
+    if not job.total_resumes:
+        return 0.0, None
+    percent = min(100.0, 100.0 * job.processed / job.total_resumes)
+    eta = None
+    started_at, updated_at = as_utc(job.started_at), as_utc(job.updated_at)
+    if job.status == JOB_RUNNING and job.processed and started_at and updated_at:
+        per_resume = (updated_at - started_at).total_seconds() / job.processed
+        eta = round(max(0, job.total_resumes - job.processed) * per_resume, 1)
+    return round(percent, 1), eta
+
+
+class MatchJobRunner:
+    """
+    Runs queued MatchJobs on a small pool of worker threads.
+
+    Jobs live in the match_jobs table, so every API process polls the same queue; a job
+    is claimed with a conditional UPDATE so only one process runs it. Each batch of
+    MATCH_JOB_CHUNK_SIZE resumes is scored, upserted into matches and committed together
+    with the job's progress and keyset cursor, so a job interrupted by a restart is put
+    back by ``requeue_stale`` and continues after its last committed batch.
+    """
+
+    def __init__(self, workers: int = MATCH_JOB_WORKERS):
+        self.workers = workers
+        self.wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        self.requeue_stale()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"match-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=30)
+        self._threads = []
+
+    def requeue_stale(self, older_than: float = MATCH_JOB_STALE_SECONDS) -> int:
+        db = SessionLocal()
+        try:
+            count = (
+                db.query(MatchJob)
+                .filter(MatchJob.status == JOB_RUNNING, MatchJob.updated_at < _now() - timedelta(seconds=older_than))
+                .update({"status": JOB_QUEUED}, synchronize_session=False)
+            )
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+    def _claim(self) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            while True:
+                candidate = (
+                    db.query(MatchJob.id).filter(MatchJob.status == JOB_QUEUED).order_by(MatchJob.id).first()
+                )
+                if candidate is None:
+                    return None
+                claimed = (
+                    db.query(MatchJob)
+                    .filter(MatchJob.id == candidate[0], MatchJob.status == JOB_QUEUED)
+                    .update({"status": JOB_RUNNING, "updated_at": _now()}, synchronize_session=False)
+                )
+                db.commit()
+                if claimed:
+                    return candidate[0]
+        finally:
+            db.close()
+
+    def compact_store(self) -> None:
+        db = SessionLocal()
+        try:
+            dropped = compact_embedding_store(db)
+            if dropped:
+                print(f"Embedding store compacted: {dropped} dead rows dropped")
+        except Exception:
+            print("Embedding store compaction failed:", traceback.format_exc())
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        last_requeue = last_compaction = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                job_id = self._claim()
+            except Exception:
+                print("Match job claim failed:", traceback.format_exc())
+                job_id = None
+            if job_id is None:
+                self.wakeup.wait(MATCH_JOB_POLL_SECONDS)
+                self.wakeup.clear()
+                if time.monotonic() - last_requeue > 60:
+                    self.requeue_stale()
+                    last_requeue = time.monotonic()
+                # Idle housekeeping; the store's file lock keeps concurrent compactions apart
+                if time.monotonic() - last_compaction > EMBEDDING_STORE_COMPACT_SECONDS:
+                    self.compact_store()
+                    last_compaction = time.monotonic()
+                continue
+            self._execute(job_id)
+
+    def _execute(self, job_id: int) -> None:
+        db = SessionLocal()
+        try:
+            job = db.get(MatchJob, job_id)
+            jd = db.query(JobDescription).filter(JobDescription.id == job.job_description_id).first()
+            if jd is None:
+                raise ValueError("Job description not found")
+            jd_vec = ensure_document_embedding(jd)
+            jd_skills = ensure_jd_skills(jd)
+            if job.started_at is None:
+                job.started_at = _now()
+                job.total_resumes = db.query(Resume.id).filter(Resume.status == STATUS_READY).count()
+            db.commit()
+
+            heap: List = [(item["score"], -item["resume_id"], item) for item in job.top_results or []]
+            heapq.heapify(heap)
+
+            for resumes in iter_ready_resumes(db, MATCH_JOB_CHUNK_SIZE, after_id=job.last_resume_id):
+                db.refresh(job)  # pick up a cancel requested from another session
+                if job.cancel_requested or self._stop.is_set():
+                    break
+                scored, matches = score_incrementally(
+                    db, jd, jd_vec, jd_skills, resumes, job.include_explanations, job.force
+                )
+                for resume, result in zip(resumes, scored):
+                    entry = (result["score"], -resume.id, result_item(jd, resume, result))
+                    if len(heap) < job.top_k:
+                        heapq.heappush(heap, entry)
+                    elif entry[:2] > heap[0][:2]:
+                        heapq.heapreplace(heap, entry)
+
+                upsert_matches(db, matches)
+                job.processed += len(resumes)
+                job.rescored += len(matches)
+                job.score_sum += sum(result["score"] for result in scored)
+                job.last_resume_id = resumes[-1].id
+                job.top_results = [item for _, _, item in sorted(heap, key=lambda e: e[:2], reverse=True)]
+                job.updated_at = _now()
+                db.commit()
+
+            if self._stop.is_set() and not job.cancel_requested:
+                # Shutting down: hand the job back so the next start continues it
+                job.status = JOB_QUEUED
+            else:
+                job.status = JOB_CANCELLED if job.cancel_requested else JOB_COMPLETED
+                job.finished_at = _now()
+            db.commit()
+        except Exception as e:
+            print("Match job failed:", job_id, traceback.format_exc())
+            db.rollback()
+            db.query(MatchJob).filter(MatchJob.id == job_id).update(
+                {"status": JOB_FAILED, "error": str(e), "finished_at": _now()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+@lru_cache(maxsize=1)
+def get_match_job_runner() -> MatchJobRunner:
+    return MatchJobRunner()
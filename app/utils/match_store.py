@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.models.entities import Match
+
+# Rows per INSERT statement; persisting 10k matches is ~10 round trips
+MATCH_UPSERT_BATCH_SIZE = 1000
+_UPDATED_COLUMNS = (
+    "score",
+    "matched_skills",
+    "missing_skills",
+    "explanations",
+    "resume_s3_url",
+    "jd_s3_url",
+    "scorer_version",
+    "created_at",
+)
+
+
+def _dialect_insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def upsert_matches(db: Session, rows: List[Dict]) -> None:
+    """
+    Insert or update Match rows keyed on (resume_id, job_description_id).
+
+    Uses multi-row ``INSERT ... ON CONFLICT DO UPDATE`` in batches on PostgreSQL and
+    SQLite; other dialects fall back to a select-then-update per row. The caller commits.
+    """
+    if not rows:
+        return
+    now = datetime.now(timezone.utc)
+    # Postgres rejects one statement touching the same key twice; last row wins
+    by_key = {(row["resume_id"], row["job_description_id"]): row for row in rows}
+    rows = [{**row, "created_at": row.get("created_at", now)} for row in by_key.values()]
+    insert = _dialect_insert(db.get_bind().dialect.name)
+    if insert is None:
+        for row in rows:
+            existing = (
+                db.query(Match)
+                .filter(Match.resume_id == row["resume_id"], Match.job_description_id == row["job_description_id"])
+                .first()
+            )
+            if existing is None:
+                db.add(Match(**row))
+            else:
+                for column in _UPDATED_COLUMNS:
+                    setattr(existing, column, row[column])
+        return
+    for start in range(0, len(rows), MATCH_UPSERT_BATCH_SIZE):
+        stmt = insert(Match.__table__).values(rows[start : start + MATCH_UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["resume_id", "job_description_id"],
+            set_={column: stmt.excluded[column] for column in _UPDATED_COLUMNS},
+        )
+        db.execute(stmt)
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Per-process counters and histograms in the Prometheus text format, served on /metrics.
+# With METRICS_ENABLED=false the decorators return the function unchanged and ``stage``
+# is a no-op context manager, so disabled instrumentation costs nothing per call.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_NAMESPACE = "resume_screener"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# (name, type, help, {label string: value}) rows produced by a collector at scrape time
+MetricFamily = Tuple[str, str, str, Dict[str, float]]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per value of a single label."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float]):
+        self.name = f"{METRICS_NAMESPACE}_{name}"
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, List] = {}  # label value -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for label_value, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{self.label}="{label_value}",le="{_format_value(bound)}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter with one series per value of a single label."""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = f"{METRICS_NAMESPACE}_{name}_total"
+        self.help = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines += [f'{self.name}{{{self.label}="{key}"}} {value}' for key, value in values]
+        return lines
+
+
+STAGE_SECONDS = Histogram("stage_seconds", "Wall time per pipeline stage (stages nest).", "stage", LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram(
+    "request_seconds", "HTTP handler latency per route, until response headers.", "route", LATENCY_BUCKETS
+)
+ENCODE_BATCH_TEXTS = Histogram("encode_batch_texts", "Texts per encoder call.", "backend", BATCH_BUCKETS)
+DOCUMENTS = Counter(
+    "documents", "Documents processed per pipeline; rate() gives documents per second.", "pipeline"
+)
+
+_collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[MetricFamily]]) -> None:
+    """Add a callback that reports gauges (cache hit ratios, queue depths) at scrape time."""
+    _collectors.append(collector)
+
+
+@contextmanager
+def _timed_stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(name, time.perf_counter() - started)
+
+
+def stage(name: str):
+    """Context manager timing a block into the stage histogram."""
+    return _timed_stage(name) if METRICS_ENABLED else nullcontext()
+
+
+def timed(name: str):
+    """Decorator timing every call of a function into the stage histogram."""
+
+    def decorator(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def observe_encode_batch(backend: str, size: int) -> None:
+    if METRICS_ENABLED:
+        ENCODE_BATCH_TEXTS.observe(backend, size)
+
+
+def count_documents(pipeline: str, amount: int = 1) -> None:
+    if METRICS_ENABLED:
+        DOCUMENTS.inc(pipeline, amount)
+
+
+def instrument_engine(engine) -> None:
+    """Time every SQL statement on ``engine`` as the "db" stage."""
+    if not METRICS_ENABLED:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            STAGE_SECONDS.observe("db", time.perf_counter() - started)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in (STAGE_SECONDS, REQUEST_SECONDS, ENCODE_BATCH_TEXTS, DOCUMENTS):
+        lines += metric.render()
+    for collector in _collectors:
+        try:
+            families = list(collector())
+        except Exception as e:
+            print("Metrics collector failed:", str(e))
+            continue
+        for name, kind, help_text, values in families:
+            full_name = f"{METRICS_NAMESPACE}_{name}"
+            lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} {kind}"]
+            for labels, value in values.items():
+                lines.append(f"{full_name}{{{labels}}} {value}" if labels else f"{full_name} {value}")
+    return "\n".join(lines) + "\n"
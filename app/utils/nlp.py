@@ -1,27 +1,66 @@
+import hashlib
+import os
 import re
-from typing import Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-try:  # make spaCy optional for environments without wheels
-    import spacy as _spacy  # type: ignore
-except Exception:
-    _spacy = None  # type: ignore
+from app.utils.metrics import timed
 
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+# Name extraction runs NER over the first lines only, where the candidate's name sits
+NAME_HEADER_LINES = int(os.getenv("NAME_HEADER_LINES", "10"))
+NAME_HEADER_CHARS = int(os.getenv("NAME_HEADER_CHARS", "1000"))
+# nlp.pipe tuning for bulk paths. n_process > 1 starts worker processes on every call and
+# pickles the docs back; for the sentencizer-only pipeline that costs more than it saves
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "256"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+# Components the NER pipeline does not need (names missing from a model are ignored)
+_NON_NER_COMPONENTS = ["tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "morphologizer"]
 
-def _get_nlp_model():
-    if _spacy is None:
-        return None
+_NLP_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_ner_nlp():
+    try:  # make spaCy optional for environments without wheels
+        import spacy  # type: ignore
+
+        nlp = spacy.load(SPACY_MODEL, exclude=_NON_NER_COMPONENTS)
+    except Exception:
+        return None  # a blank pipeline has no NER; extract_name falls back to the heuristic
+    # The small models' NER has its own tok2vec; drop the shared one when nothing listens
+    if "tok2vec" in nlp.pipe_names and not getattr(nlp.get_pipe("tok2vec"), "listening_components", None):
+        nlp.remove_pipe("tok2vec")
+    return nlp if "ner" in nlp.pipe_names else None
+
+
+@lru_cache(maxsize=1)
+def _load_sentence_nlp():
     try:
-        return _spacy.load("en_core_web_sm")
+        import spacy  # type: ignore
+
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        return nlp
     except Exception:
-        try:
-            return _spacy.blank("en")
-        except Exception:
-            return None
+        return None
+
+
+def get_ner_nlp():
+    """NER-only spaCy pipeline for name extraction (None without spaCy or SPACY_MODEL)."""
+    with _NLP_LOCK:  # a caller arriving during the load waits for it instead of loading again
+        return _load_ner_nlp()
 
 
-NLP = _get_nlp_model()
+def get_sentence_nlp():
+    """Tokenizer plus rule-based sentencizer (None without spaCy); built once, never mutated."""
+    with _NLP_LOCK:
+        return _load_sentence_nlp()
+
 
 EMAIL_REGEX = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_WHITESPACE_RE = re.compile(r"\s+")
 
 DEFAULT_SKILLS = {
      # Programming Languages
@@ -54,6 +93,9 @@ DEFAULT_SKILLS = {
     "project management", "agile", "scrum","product management","ux/ui design","sdlc",
 
 }
+DEFAULT_SKILL_SET = frozenset(DEFAULT_SKILLS)
+# Persisted skill lists are tagged with this; editing DEFAULT_SKILLS invalidates them
+SKILL_VOCABULARY_VERSION = hashlib.sha1("\n".join(sorted(DEFAULT_SKILL_SET)).encode()).hexdigest()[:12]
 
 
 def extract_email(text: str) -> Optional[str]:
@@ -61,12 +103,22 @@ def extract_email(text: str) -> Optional[str]:
     return match.group(0) if match else None
 
 
-def extract_name(text: str) -> Optional[str]:
-    # Use NER PERSON entity if spaCy model is available, else heuristic from first lines
-    if NLP is not None:
-        doc = NLP(text)
-        for ent in getattr(doc, "ents", []):
-            if getattr(ent, "label_", "") == "PERSON" and 2 <= len(ent.text.split()) <= 4:
+def header_region(text: str) -> str:
+    """The first NAME_HEADER_LINES non-empty lines, at most NAME_HEADER_CHARS characters."""
+    lines = []
+    for line in text.splitlines():
+        if line.strip():
+            lines.append(line.strip())
+            if len(lines) >= NAME_HEADER_LINES:
+                break
+    return "\n".join(lines)[:NAME_HEADER_CHARS]
+
+
+def _name_from(doc, text: str) -> Optional[str]:
+    # NER PERSON entity in the header if there is a doc, else heuristic from first lines
+    if doc is not None:
+        for ent in doc.ents:
+            if ent.label_ == "PERSON" and 2 <= len(ent.text.split()) <= 4:
                 return ent.text
     first_lines = [l.strip() for l in text.splitlines()[:5] if l.strip()]
     if first_lines:
@@ -76,16 +128,99 @@ def extract_name(text: str) -> Optional[str]:
     return None
 
 
+def extract_name(text: str) -> Optional[str]:
+    nlp = get_ner_nlp()
+    return _name_from(nlp(header_region(text)) if nlp is not None else None, text)
+
+
+def extract_names(texts: List[str]) -> List[Optional[str]]:
+    """``extract_name`` for many texts, with the headers run through NER in nlp.pipe batches."""
+    nlp = get_ner_nlp()
+    if nlp is None:
+        return [_name_from(None, text) for text in texts]
+    docs = nlp.pipe((header_region(text) for text in texts), batch_size=SPACY_BATCH_SIZE)
+    return [_name_from(doc, text) for doc, text in zip(docs, texts)]
+
+
+class SkillMatcher:
+    """
+    Single-pass matcher for a fixed skill vocabulary.
+
+    Text is lowercased and whitespace-collapsed once, then scanned with one combined
+    alternation, factored into a character trie so each position is tried in a single
+    greedy walk (longest skill first), anchored at word boundaries. Skills that are a
+    string prefix of a longer skill (e.g. "c" / "c++") are checked at the same position,
+    so results match the old one-regex-per-skill loop exactly.
+    """
+
+    def __init__(self, vocabulary: FrozenSet[str]):
+        self.by_form: Dict[str, List[str]] = {}
+        for skill in vocabulary:
+            form = " ".join(skill.split())
+            if form:
+                self.by_form.setdefault(form, []).append(skill)
+        forms = sorted(self.by_form)
+        self.pattern = re.compile(r"\b(?=(" + _trie_regex(forms) + r")\b)") if forms else None
+        # For each form, the shorter forms that could also match at the same start position
+        self.prefix_patterns: Dict[str, List[Tuple[str, "re.Pattern[str]"]]] = {
+            form: [(other, re.compile(re.escape(other) + r"\b")) for other in forms if other != form and form.startswith(other)]
+            for form in forms
+        }
+
+    def find(self, text: str) -> List[str]:
+        if self.pattern is None:
+            return []
+        normalized = _WHITESPACE_RE.sub(" ", text.lower())
+        found_forms = set()
+        for match in self.pattern.finditer(normalized):
+            form = match.group(1)
+            found_forms.add(form)
+            for other, other_pattern in self.prefix_patterns[form]:
+                if other not in found_forms and other_pattern.match(normalized, match.start()):
+                    found_forms.add(other)
+            if len(found_forms) == len(self.by_form):
+                break
+        found = {skill for form in found_forms for skill in self.by_form[form]}
+        return sorted(found, key=lambda s: s.lower())
+
+
+def _trie_regex(words: List[str]) -> str:
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def _build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + _build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy optional: the longer continuation is tried first, shorter on backtrack
+            return "(?:" + body + ")?"
+        return body
+
+    return _build(trie)
+
+
+@lru_cache(maxsize=32)
+def get_skill_matcher(vocabulary: FrozenSet[str]) -> SkillMatcher:
+    # frozenset hashing keys the cache by vocabulary contents, not by call site
+    return SkillMatcher(vocabulary)
+
+
+def _vocabulary_key(vocabulary: Optional[List[str]]) -> FrozenSet[str]:
+    if not vocabulary:
+        return DEFAULT_SKILL_SET
+    return frozenset(vocabulary) | DEFAULT_SKILL_SET
+
+
+@timed("extract_skills")
 def extract_skills(text: str, vocabulary: Optional[List[str]] = None) -> List[str]:
-    vocab = set((vocabulary or []) + list(DEFAULT_SKILLS))
-    text_lower = text.lower()
-    found = []
-    for skill in sorted(vocab):
-        tokens = skill.split()
-        pattern = r"\b" + r"\s+".join([re.escape(t) for t in tokens]) + r"\b"
-        if re.search(pattern, text_lower):
-            found.append(skill)
-    return sorted(set(found), key=lambda s: s.lower())
+    return get_skill_matcher(_vocabulary_key(vocabulary)).find(text)
 
 
 def extract_experience_years(text: str) -> Optional[int]:
@@ -95,14 +230,20 @@ def extract_experience_years(text: str) -> Optional[int]:
     return max(candidates) if candidates else None
 
 
-def extract_fields(text: str) -> Dict[str, Optional[str]]:
-    name = extract_name(text)
-    email = extract_email(text)
+def _fields(text: str, name: Optional[str]) -> Dict[str, Optional[str]]:
     skills = extract_skills(text)
-    experience = extract_experience_years(text)
     return {
         "candidate_name": name,
-        "candidate_email": email,
+        "candidate_email": extract_email(text),
         "skills": ", ".join(skills) if skills else None,
-        "total_experience_years": experience,
-    } 
\ No newline at end of file
+        "total_experience_years": extract_experience_years(text),
+    }
+
+
+def extract_fields(text: str) -> Dict[str, Optional[str]]:
+    return _fields(text, extract_name(text))
+
+
+def extract_fields_many(texts: List[str]) -> List[Dict[str, Optional[str]]]:
+    """``extract_fields`` for many texts with one batched NER pass."""
+    return [_fields(text, name) for text, name in zip(texts, extract_names(texts))]
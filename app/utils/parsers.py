@@ -1,20 +1,44 @@
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Tuple
 
+from app.utils.metrics import timed
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+PARSER_PROCESSES = int(os.getenv("PARSER_PROCESSES", str(max(1, (os.cpu_count() or 2) - 1))))
+# PDFs longer than this are split into page ranges of this size across pool workers
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+DOCX_CONTENT_TYPES = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+)
+
+
+def extract_pdf_page_range(file_bytes: bytes, start: int, end: int) -> str:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        # Collect and join once: repeated += is quadratic on long documents
+        return "".join(page.extract_text() or "" for page in pdf.pages[start:end])
+
+
+def count_pdf_pages(file_bytes: bytes) -> int:
     import pdfplumber
-    import io
 
-    text_content = ""
     with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        for page in pdf.pages:
-            text_content += page.extract_text() or ""
-    return text_content
+        return len(pdf.pages)
+
+
+def extract_text_from_pdf(file_bytes: bytes) -> str:
+    return extract_pdf_page_range(file_bytes, 0, None)
 
 
 def extract_text_from_docx(file_bytes: bytes) -> str:
     from docx import Document
-    import io
 
     doc = Document(io.BytesIO(file_bytes))
     paragraphs = [p.text for p in doc.paragraphs]
@@ -32,30 +56,76 @@ def sniff_extension(filename: str) -> str:
     return "unknown"
 
 
-def extract_text(filename: str, content_type: str, file_bytes: bytes) -> Tuple[str, str]:
-    ext = sniff_extension(filename)
+# Leading bytes tolerated before a "%PDF-" header: a UTF-8 BOM and a little whitespace
+PDF_HEADER_SLACK = 16
+
+
+def sniff_magic(file_bytes: bytes) -> str:
+    """Identify a PDF or DOCX from the file's leading bytes; "unknown" otherwise."""
+    head = file_bytes[:1024]
+    stripped = head[3:] if head.startswith(b"\xef\xbb\xbf") else head
+    stripped = stripped.lstrip()
+    if stripped.startswith(b"%PDF-") and len(head) - len(stripped) <= PDF_HEADER_SLACK:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+    return "unknown"
+
+
+def detect_format(filename: str, content_type: str, file_bytes: bytes) -> str:
+    # A recognised PDF/DOCX signature wins over the declared name/type, so a mislabelled
+    # file costs one parse, not three. Otherwise the declared type decides: a file that
+    # claims to be a PDF or DOCX but lacks the signature fails to parse instead of being
+    # stored as garbage text.
+    fmt = sniff_magic(file_bytes)
+    if fmt != "unknown":
+        return fmt
+    ext = sniff_extension(filename or "")
     if ext == "pdf" or content_type in ("application/pdf",):
+        return "pdf"
+    if ext == "docx" or content_type in DOCX_CONTENT_TYPES:
+        return "docx"
+    return "txt"
+
+
+def extract_text(filename: str, content_type: str, file_bytes: bytes) -> Tuple[str, str]:
+    used = detect_format(filename, content_type, file_bytes)
+    if used == "pdf":
         text = extract_text_from_pdf(file_bytes)
-        used = "pdf"
-    elif ext == "docx" or content_type in (
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword",
-    ):
+    elif used == "docx":
         text = extract_text_from_docx(file_bytes)
-        used = "docx"
-    elif ext == "txt" or content_type.startswith("text/"):
-        text = file_bytes.decode(errors="ignore")
-        used = "txt"
     else:
-        # attempt pdf then docx then text
-        try:
-            text = extract_text_from_pdf(file_bytes)
-            used = "pdf"
-        except Exception:
-            try:
-                text = extract_text_from_docx(file_bytes)
-                used = "docx"
-            except Exception:
-                text = file_bytes.decode(errors="ignore")
-                used = "txt"
-    return text, used 
\ No newline at end of file
+        text = file_bytes.decode(errors="ignore")
+    return text, used
+
+
+@lru_cache(maxsize=1)
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Process pool for CPU-bound document parsing and field extraction (PARSER_PROCESSES)."""
+    # spawn, not fork: the API process may already hold model weights and threads
+    return ProcessPoolExecutor(max_workers=PARSER_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+
+
+@timed("extract_text")
+def extract_text_in_pool(filename: str, content_type: str, file_bytes: bytes) -> Tuple[str, str]:
+    """
+    Blocking ``extract_text`` that runs on the parse pool instead of the calling thread.
+
+    Long PDFs are split into PDF_PAGES_PER_TASK page ranges parsed by separate workers
+    and joined in order. Call from a worker thread, never directly on the event loop.
+    """
+    pool = get_parse_pool()
+    if detect_format(filename, content_type, file_bytes) == "pdf":
+        pages = pool.submit(count_pdf_pages, file_bytes).result()
+        if pages > PDF_PAGES_PER_TASK:
+            futures = [
+                pool.submit(extract_pdf_page_range, file_bytes, start, start + PDF_PAGES_PER_TASK)
+                for start in range(0, pages, PDF_PAGES_PER_TASK)
+            ]
+            return "".join(f.result() for f in futures), "pdf"
+    return pool.submit(extract_text, filename, content_type, file_bytes).result()
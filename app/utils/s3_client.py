@@ -1,34 +1,47 @@
-import boto3
 import os
 import asyncio
 from io import BytesIO
-from botocore.exceptions import BotoCoreError, ClientError
 from dotenv import load_dotenv
 
+from app.utils.metrics import timed
+
 load_dotenv()
 
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 BUCKET = os.getenv("S3_BUCKET")
 
-# Initialize S3 client globally
-s3 = boto3.client("s3", region_name=AWS_REGION)
+# S3 client, created on first upload: importing boto3 is a noticeable part of app import
+s3 = None
 
 
-async def upload_resume(file_obj: BytesIO, filename: str, content_type: str = None, folder: str = None) -> str:
-    
+def get_s3_client():
+    global s3
+    if s3 is None:
+        import boto3
+
+        s3 = boto3.client("s3", region_name=AWS_REGION)
+    return s3
+
+
+@timed("s3_upload")
+def upload_fileobj(file_obj: BytesIO, filename: str, content_type: str = None, folder: str = None) -> str:
+    """Blocking S3 upload; use from worker threads. Returns the object URL."""
     if not BUCKET:
         raise ValueError("S3_BUCKET not configured in environment variables")
 
     key = f"{folder}/{filename}" if folder else filename
     extra_args = {"ContentType": content_type} if content_type else {}
 
-    def _upload():
-        try:
-            s3.upload_fileobj(file_obj, BUCKET, key, ExtraArgs=extra_args)
-        except (BotoCoreError, ClientError) as e:
-            raise RuntimeError(f"Failed to upload to S3: {e}")
+    from botocore.exceptions import BotoCoreError, ClientError
 
-    # Run upload in a non-blocking thread
-    await asyncio.to_thread(_upload)
+    try:
+        get_s3_client().upload_fileobj(file_obj, BUCKET, key, ExtraArgs=extra_args)
+    except (BotoCoreError, ClientError) as e:
+        raise RuntimeError(f"Failed to upload to S3: {e}")
 
     return f"https://{BUCKET}.s3.{AWS_REGION}.amazonaws.com/{key}"
+
+
+async def upload_resume(file_obj: BytesIO, filename: str, content_type: str = None, folder: str = None) -> str:
+    # Run upload in a non-blocking thread
+    return await asyncio.to_thread(upload_fileobj, file_obj, filename, content_type, folder)
@@ -1,11 +1,22 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
-from app.utils.embeddings import embed_texts, similarity_score_0_100
-from app.utils.nlp import extract_skills, NLP
+from app.utils.embeddings import embed_texts, similarity_score_0_100, similarity_scores_0_100
+from app.utils.metrics import count_documents, timed
+from app.utils.nlp import SPACY_BATCH_SIZE, SPACY_N_PROCESS, extract_skills, get_sentence_nlp
+from app.utils.skill_vectors import skill_similarity_matrix
 import re
 
+# Bump when the scoring logic changes so stored matches are recomputed
+SCORING_VERSION = "1"
+MAX_EXPLANATION_SENTENCES = 50
+SEMANTIC_SKILL_THRESHOLD = 0.6
+# Batch engine tuning: texts per encoder forward pass, and resumes whose sentences are
+# flattened into one encode call (bounds the sentence-embedding matrix held in memory)
+ENCODE_BATCH_SIZE = 256
+EXPLANATION_CHUNK_SIZE = 256
+
 
 def jaccard_similarity(a: List[str], b: List[str]) -> float:
     set_a, set_b = set([x.lower() for x in a]), set([x.lower() for x in b])
@@ -16,48 +27,58 @@ def jaccard_similarity(a: List[str], b: List[str]) -> float:
     return inter / union if union else 0.0
 
 
+@timed("semantic_skill_match")
 def semantic_skill_match(resume_skills: List[str], jd_skills: List[str]) -> Tuple[List[str], List[str]]:
-    # Try to match semantically if exact match fails; threshold tuned lightly
+    # Try to match semantically if exact match fails; threshold tuned lightly.
+    # Similarities come from the precomputed skill table, so no model call for known skills.
     if not resume_skills or not jd_skills:
         return [], jd_skills
-    texts = [*resume_skills, *jd_skills]
-    vectors = embed_texts(texts)
-    r_vecs = vectors[: len(resume_skills)]
-    j_vecs = vectors[len(resume_skills) :]
-    matched = set()
-    for j_idx, j_skill in enumerate(jd_skills):
-        sims = np.dot(r_vecs, j_vecs[j_idx])  # cosine since normalized
-        if sims.max(initial=-1.0) >= 0.6:
-            matched.add(j_skill)
+    sims = skill_similarity_matrix(jd_skills, resume_skills)  # cosine since normalized
+    best = sims.max(axis=1)
+    matched = {j_skill for j_skill, sim in zip(jd_skills, best) if sim >= SEMANTIC_SKILL_THRESHOLD}
     matched_list = sorted(matched, key=lambda s: s.lower())
     missing_list = sorted([s for s in jd_skills if s not in matched], key=lambda s: s.lower())
     return matched_list, missing_list
 
 
+def _regex_sentences(text: str) -> List[str]:
+    # Fallback regex split on punctuation followed by whitespace/newline
+    parts = re.split(r"(?<=[.!?])\s+", text)
+    return [p.strip() for p in parts if p and p.strip()]
+
+
+def _doc_sentences(doc) -> List[str]:
+    return [s.text.strip() for s in doc.sents if s.text.strip()]
+
+
+@timed("split_sentences")
 def split_sentences(text: str) -> List[str]:
-    # Prefer spaCy if available for better sentence boundaries
-    if NLP is not None:
+    # spaCy's rule-based sentencizer if available; the pipeline is shared and never mutated
+    nlp = get_sentence_nlp()
+    if nlp is not None:
         try:
-            if "senter" not in NLP.pipe_names and "sentencizer" not in NLP.pipe_names:
-                NLP.add_pipe("sentencizer")
-            doc = NLP(text)
-            return [s.text.strip() for s in getattr(doc, "sents", []) if s.text.strip()]
+            return _doc_sentences(nlp(text))
         except Exception:
             pass
-    # Fallback regex split on punctuation followed by whitespace/newline
-    parts = re.split(r"(?<=[.!?])\s+", text)
-    return [p.strip() for p in parts if p and p.strip()]
+    return _regex_sentences(text)
 
 
-def score_resume_against_jd(resume_text: str, jd_text: str) -> Dict:
-    # Embedding similarity score
-    vecs = embed_texts([resume_text, jd_text])
-    score = similarity_score_0_100(vecs[0], vecs[1])
+@timed("split_sentences_batch")
+def split_sentences_many(texts: Sequence[str]) -> List[List[str]]:
+    """``split_sentences`` for many texts in nlp.pipe batches (SPACY_BATCH_SIZE, SPACY_N_PROCESS)."""
+    nlp = get_sentence_nlp()
+    if nlp is not None and texts:
+        try:
+            n_process = SPACY_N_PROCESS if len(texts) > SPACY_BATCH_SIZE else 1
+            docs = nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE, n_process=n_process)
+            return [_doc_sentences(doc) for doc in docs]
+        except Exception:
+            pass
+    return [_regex_sentences(text) for text in texts]
 
-    # Skill overlap
-    resume_skills = extract_skills(resume_text)
-    jd_skills = extract_skills(jd_text)
 
+def match_skills(resume_skills: List[str], jd_skills: List[str]) -> Tuple[List[str], List[str]]:
+    """Matched and missing JD skills: exact overlap, then the semantic fallback for the rest."""
     exact_matched = sorted(set(resume_skills) & set(jd_skills), key=lambda s: s.lower())
     exact_missing = sorted(set(jd_skills) - set(exact_matched), key=lambda s: s.lower())
 
@@ -68,23 +89,157 @@ def score_resume_against_jd(resume_text: str, jd_text: str) -> Dict:
     else:
         matched_skills = exact_matched
         missing_skills = exact_missing
+    return matched_skills, missing_skills
+
+
+def _top_sentences(sentences: List[str], sentence_vecs: np.ndarray, jd_vec: np.ndarray, top_k: int = 5) -> List[str]:
+    if not sentences:
+        return []
+    sims = np.dot(sentence_vecs, jd_vec)
+    top_idx = np.argsort(-sims)[:top_k]
+    return [sentences[i] for i in top_idx]
+
+
+@timed("score_resume")
+def score_resume_against_jd(
+    resume_text: str,
+    jd_text: str,
+    resume_vec: Optional[np.ndarray] = None,
+    jd_vec: Optional[np.ndarray] = None,
+    resume_skills: Optional[List[str]] = None,
+    jd_skills: Optional[List[str]] = None,
+    resume_sentences: Optional[List[str]] = None,
+    resume_sentence_vecs: Optional[np.ndarray] = None,
+) -> Dict:
+    # Precomputed features (see app.utils.features) skip their extraction/encode step.
+    # Embedding similarity score; stored document vectors skip model inference entirely
+    count_documents("scoring")
+    if resume_vec is None:
+        resume_vec = embed_texts([resume_text])[0]
+    if jd_vec is None:
+        jd_vec = embed_texts([jd_text])[0]
+    score = similarity_score_0_100(resume_vec, jd_vec)
+
+    # Skill overlap
+    if resume_skills is None:
+        resume_skills = extract_skills(resume_text)
+    if jd_skills is None:
+        jd_skills = extract_skills(jd_text)
+    matched_skills, missing_skills = match_skills(resume_skills, jd_skills)
 
     # Explanation snippets: top sentences in resume closest to JD
-    resume_sentences = split_sentences(resume_text)[:50]
-    if not resume_sentences:
-        explanations = []
-    else:
-        all_texts = [jd_text] + resume_sentences
-        all_vecs = embed_texts(all_texts)
-        jd_vec = all_vecs[0]
-        res_vecs = all_vecs[1:]
-        sims = np.dot(res_vecs, jd_vec)
-        top_idx = np.argsort(-sims)[:5]
-        explanations = [resume_sentences[i] for i in top_idx]
+    if resume_sentences is None:
+        resume_sentences = split_sentences(resume_text)[:MAX_EXPLANATION_SENTENCES]
+        resume_sentence_vecs = None
+    if resume_sentence_vecs is None and resume_sentences:
+        resume_sentence_vecs = embed_texts(resume_sentences)
+    explanations = _top_sentences(resume_sentences, resume_sentence_vecs, jd_vec)
 
     return {
         "score": score,
         "matched_skills": matched_skills,
         "missing_skills": missing_skills,
         "explanations": explanations,
-    } 
\ No newline at end of file
+    }
+
+
+def _texts_for(resume_texts: Optional[Sequence[Optional[str]]], indices: Sequence[int], purpose: str) -> List[str]:
+    """The resume texts at ``indices``; ValueError if any is missing, rather than scoring ""."""
+    texts = [resume_texts[idx] if resume_texts is not None else None for idx in indices]
+    missing = [idx for idx, text in zip(indices, texts) if text is None]
+    if missing:
+        raise ValueError(f"Resume text required for {purpose} but missing for resumes at positions {missing[:10]}")
+    return texts
+
+
+@timed("score_resumes")
+def score_resumes_against_jd(
+    resume_texts: Optional[Sequence[Optional[str]]],
+    jd_text: str,
+    resume_vecs: Optional[np.ndarray] = None,
+    jd_vec: Optional[np.ndarray] = None,
+    explain: bool = True,
+    resume_skills: Optional[Sequence[List[str]]] = None,
+    jd_skills: Optional[List[str]] = None,
+    resume_sentences: Optional[Sequence[List[str]]] = None,
+    resume_sentence_vecs: Optional[Sequence[Optional[np.ndarray]]] = None,
+) -> List[Dict]:
+    """
+    Score N resumes against one JD in a single pass.
+
+    Document scores come from one matrix-vector product over the (N, dim) resume matrix.
+    JD skills are extracted once, the semantic skill fallback is a skill-table lookup, and
+    explanation sentences are encoded across resumes in large batches.
+    Per-resume precomputed features (parallel to ``resume_texts``) skip extraction and
+    encoding for the resumes that have them. A text may be None (or ``resume_texts`` None
+    altogether) when every feature of that resume is given; a ValueError is raised if one
+    is needed after all. Each result has the same shape as ``score_resume_against_jd``.
+    """
+    if resume_texts is not None:
+        count = len(resume_texts)
+    elif resume_vecs is not None:
+        count = len(resume_vecs)
+    else:
+        raise ValueError("score_resumes_against_jd needs resume_texts or resume_vecs")
+    if not count:
+        return []
+    count_documents("scoring", count)
+    if resume_vecs is None:
+        resume_vecs = embed_texts(_texts_for(resume_texts, range(count), "embedding"), batch_size=ENCODE_BATCH_SIZE)
+    if jd_vec is None:
+        jd_vec = embed_texts([jd_text])[0]
+    scores = similarity_scores_0_100(np.asarray(resume_vecs), jd_vec)
+
+    # Skill overlap (semantic fallback reads the precomputed skill table)
+    if jd_skills is None:
+        jd_skills = extract_skills(jd_text)
+    if resume_skills is None:
+        all_resume_skills = [extract_skills(text) for text in _texts_for(resume_texts, range(count), "skills")]
+    else:
+        all_resume_skills = list(resume_skills)
+
+    results = []
+    for idx, resume_skills in enumerate(all_resume_skills):
+        matched_skills, missing_skills = match_skills(resume_skills, jd_skills)
+        results.append(
+            {
+                "score": int(scores[idx]),
+                "matched_skills": matched_skills,
+                "missing_skills": missing_skills,
+                "explanations": [],
+            }
+        )
+
+    if not explain:
+        return results
+
+    # Explanation snippets: resumes without stored sentence vectors have their sentences
+    # flattened, a chunk of resumes at a time, into one encode call
+    for chunk_start in range(0, count, EXPLANATION_CHUNK_SIZE):
+        chunk_end = min(chunk_start + EXPLANATION_CHUNK_SIZE, count)
+        pending = []
+        unsplit = [
+            idx for idx in range(chunk_start, chunk_end) if resume_sentences is None or resume_sentences[idx] is None
+        ]
+        split = dict(zip(unsplit, split_sentences_many(_texts_for(resume_texts, unsplit, "explanations"))))
+        for idx in range(chunk_start, chunk_end):
+            sentences = resume_sentences[idx] if resume_sentences is not None else None
+            vecs = resume_sentence_vecs[idx] if resume_sentence_vecs is not None else None
+            if sentences is None:
+                sentences = split[idx][:MAX_EXPLANATION_SENTENCES]
+                vecs = None
+            if vecs is None and sentences:
+                pending.append((idx, sentences))
+            else:
+                results[idx]["explanations"] = _top_sentences(sentences, vecs, jd_vec)
+        flat = [sentence for _, sentences in pending for sentence in sentences]
+        if not flat:
+            continue
+        flat_vecs = embed_texts(flat, batch_size=ENCODE_BATCH_SIZE)
+        offset = 0
+        for idx, sentences in pending:
+            vecs = flat_vecs[offset : offset + len(sentences)]
+            offset += len(sentences)
+            results[idx]["explanations"] = _top_sentences(sentences, vecs, jd_vec)
+
+    return results
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils.embeddings import EMBEDDING_MODEL_VERSION, embed_texts
+from app.utils.nlp import DEFAULT_SKILL_SET, SKILL_VOCABULARY_VERSION
+
+SKILL_CACHE_DIR = os.getenv("SKILL_CACHE_DIR", "data/skills")
+SKILL_VECTOR_LRU_SIZE = int(os.getenv("SKILL_VECTOR_LRU_SIZE", "4096"))
+
+
+class SkillTable:
+    """
+    Embeddings and the full pairwise cosine-similarity matrix for DEFAULT_SKILLS.
+
+    Built once per (vocabulary, model) and cached as ``.npy`` files in SKILL_CACHE_DIR, so
+    semantic matching between vocabulary skills is an index lookup with no model call.
+    """
+
+    def __init__(self):
+        self.skills: List[str] = sorted(DEFAULT_SKILL_SET)
+        self.index: Dict[str, int] = {skill: i for i, skill in enumerate(self.skills)}
+        tag = hashlib.sha1(f"{SKILL_VOCABULARY_VERSION}:{EMBEDDING_MODEL_VERSION}".encode()).hexdigest()[:12]
+        self._vectors_path = os.path.join(SKILL_CACHE_DIR, f"skill_vectors_{tag}.npy")
+        self.vectors = self._load_or_embed()
+        self.similarity = self.vectors @ self.vectors.T
+
+    def _load_or_embed(self) -> np.ndarray:
+        try:
+            vectors = np.load(self._vectors_path)
+            if vectors.shape[0] == len(self.skills):
+                return vectors
+        except (OSError, ValueError):
+            pass
+        vectors = np.asarray(embed_texts(self.skills), dtype=np.float32)
+        try:
+            os.makedirs(SKILL_CACHE_DIR, exist_ok=True)
+            tmp = self._vectors_path + ".tmp.npy"
+            np.save(tmp, vectors)
+            os.replace(tmp, self._vectors_path)
+        except OSError as e:
+            print("Could not cache skill vectors:", str(e))
+        return vectors
+
+
+class SkillVectorLRU:
+    """Bounded cache of embeddings for skills outside the default vocabulary."""
+
+    def __init__(self, maxsize: int = SKILL_VECTOR_LRU_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, skills: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for skill in skills:
+                if skill in self._data:
+                    self._data.move_to_end(skill)
+                    found[skill] = self._data[skill]
+        misses = sorted({s for s in skills if s not in found})
+        self.hits += len(found)
+        self.misses += len(misses)
+        if misses:
+            # One encode call for every miss, outside the lock
+            vectors = embed_texts(misses)
+            with self._lock:
+                for skill, vec in zip(misses, vectors):
+                    found[skill] = vec
+                    self._data[skill] = vec
+                    self._data.move_to_end(skill)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return found
+
+
+@lru_cache(maxsize=1)
+def get_skill_table() -> SkillTable:
+    return SkillTable()
+
+
+@lru_cache(maxsize=1)
+def get_skill_vector_cache() -> SkillVectorLRU:
+    return SkillVectorLRU()
+
+
+def skill_similarity_matrix(jd_skills: List[str], resume_skills: List[str]) -> np.ndarray:
+    """Cosine similarity of every JD skill (rows) against every resume skill (columns)."""
+    table = get_skill_table()
+    j_idx = [table.index.get(s) for s in jd_skills]
+    r_idx = [table.index.get(s) for s in resume_skills]
+    if None not in j_idx and None not in r_idx:
+        return table.similarity[np.ix_(j_idx, r_idx)]
+
+    unknown = [s for s in (*jd_skills, *resume_skills) if s not in table.index]
+    extra = get_skill_vector_cache().get_many(unknown)
+
+    def _vectors(skills: List[str]) -> np.ndarray:
+        return np.stack([table.vectors[table.index[s]] if s in table.index else extra[s] for s in skills])
+
+    return _vectors(jd_skills) @ _vectors(resume_skills).T
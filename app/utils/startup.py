@@ -0,0 +1,180 @@
+"""
+Startup phases, run lazily instead of at import.
+
+Importing the app loads no model and opens no database connection. Once a worker has
+started, ``get_startup().start()`` runs the phases below in a background thread, so health
+checks answer at once and /ready reports 503 until every phase is done; the first real
+request then finds the models loaded and the inference path warm.
+
+PRELOAD_MODELS=true loads the models (the spaCy sentencizer and the torch encoder) at import
+instead. Under a pre-forking server that imports the app once before forking
+(``gunicorn -c gunicorn.conf.py main:app``) the workers then share those pages
+copy-on-write rather than each holding its own copy. Anything that starts threads or
+opens connections (ONNX Runtime sessions, the database, the parse pool) is left to the
+per-worker warm-up, since threads and sockets do not survive a fork.
+"""
+import os
+import threading
+import time
+import traceback
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+# Run every phase in the background when a worker starts; off: only REQUIRED_PHASES,
+# models load on first use
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "false").lower() in ("1", "true", "yes")
+# Create missing tables and add missing columns/indexes on startup (app.models.migrations);
+# off when the schema is managed elsewhere (then run `python migrate.py` on deploy)
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "true").lower() in ("1", "true", "yes")
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+def _database() -> None:
+    from sqlalchemy import text
+
+    from app.models.database import engine
+    from app.models.migrations import upgrade_schema
+
+    if DB_CREATE_TABLES:
+        upgrade_schema(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def _workers() -> None:
+    from app.utils.ingest import get_ingest_worker
+    from app.utils.match_jobs import get_match_job_runner
+
+    get_ingest_worker().start()
+    get_match_job_runner().start()
+
+
+def _nlp() -> None:
+    # The API process only splits sentences; the NER pipeline loads in the parse pool
+    from app.utils.nlp import get_sentence_nlp
+
+    get_sentence_nlp()
+
+
+def _encoder() -> None:
+    from app.utils.embeddings import get_encoder
+
+    get_encoder()
+
+
+def _inference() -> None:
+    from app.utils.concurrency import run_inference
+    from app.utils.embeddings import _encode
+    from app.utils.scoring import split_sentences
+    from app.utils.skill_vectors import get_skill_table
+
+    # Skill table first: on a cold SKILL_CACHE_DIR it is the first real encode call
+    get_skill_table()
+    run_inference(_encode, ["Warm-up: first forward pass of the encoder."])  # not cached, always runs
+    split_sentences("Warm-up sentence one. Warm-up sentence two.")
+
+
+def _parse_pool() -> None:
+    from app.utils.nlp import extract_fields
+    from app.utils.parsers import PARSER_PROCESSES, get_parse_pool
+
+    # A task per process, so the spawned workers import the app modules and load spaCy now
+    pool = get_parse_pool()
+    for future in [pool.submit(extract_fields, "Warm Up\nwarm.up@example.com") for _ in range(PARSER_PROCESSES)]:
+        future.result()
+
+
+def _vector_index() -> None:
+    from app.utils.vector_index import get_resume_index
+
+    get_resume_index()
+
+
+def _s3() -> None:
+    from app.utils.s3_client import BUCKET, get_s3_client
+
+    if BUCKET:
+        get_s3_client()
+
+
+class StartupPhases:
+    """
+    Named startup steps with their state, duration and error, run in order at most once each.
+
+    A failed phase stops the run, since later phases may rely on it; running again (a
+    /ready probe does) retries from there.
+    """
+
+    def __init__(self, phases: Dict[str, Callable[[], None]]):
+        self.phases = phases
+        self._state: Dict[str, Dict] = {name: {"status": PENDING} for name in phases}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self, names: Optional[List[str]] = None) -> None:
+        for name in names or list(self.phases):
+            with self._lock:
+                if self._state[name]["status"] in (RUNNING, DONE):
+                    continue
+                self._state[name] = {"status": RUNNING}
+            started = time.perf_counter()
+            try:
+                self.phases[name]()
+                state = {"status": DONE}
+            except Exception as e:
+                print(f"Startup phase {name} failed:", str(e))
+                traceback.print_exc()
+                state = {"status": FAILED, "error": str(e)}
+            state["seconds"] = round(time.perf_counter() - started, 3)
+            with self._lock:
+                self._state[name] = state
+            if state["status"] == FAILED:
+                return
+
+    def start(self, names: Optional[List[str]] = None) -> None:
+        """Run the phases not yet done (failed ones included) in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run, args=(names,), name="warm-up", daemon=True)
+        self._thread.start()
+
+    def state(self, names: Optional[List[str]] = None) -> Dict:
+        """Every phase's state; ``ready`` once the phases in ``names`` (default: all) are done."""
+        with self._lock:
+            phases = {name: dict(state) for name, state in self._state.items()}
+        ready = all(phases[name]["status"] == DONE for name in names or phases)
+        return {"ready": ready, "phases": phases}
+
+
+# The schema and the background workers; run even with WARM_UP_ON_STARTUP off
+REQUIRED_PHASES = ["database", "workers"]
+STARTUP_PHASES = None if WARM_UP_ON_STARTUP else REQUIRED_PHASES
+
+# Safe to run before a fork: plain memory, no threads, sockets or child processes
+PRELOAD_PHASES = ["nlp", "encoder"]
+
+
+@lru_cache(maxsize=1)
+def get_startup() -> StartupPhases:
+    return StartupPhases(
+        {
+            "database": _database,
+            "workers": _workers,
+            "nlp": _nlp,
+            "encoder": _encoder,
+            "inference": _inference,
+            "parse_pool": _parse_pool,
+            "vector_index": _vector_index,
+            "s3": _s3,
+        }
+    )
+
+
+def preload_models() -> None:
+    """Load model weights now, in the importing (pre-fork) process; see PRELOAD_MODELS."""
+    from app.utils.embeddings import EMBEDDING_BACKEND
+
+    # ONNX Runtime starts its thread pools with the session, so it is loaded after the fork
+    get_startup().run([name for name in PRELOAD_PHASES if name != "encoder" or EMBEDDING_BACKEND == "torch"])
@@ -0,0 +1,217 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.embeddings import EMBEDDING_MODEL_VERSION
+
+try:  # hnswlib is optional; fall back to an exact in-memory scan without it
+    import hnswlib as _hnswlib  # type: ignore
+except Exception:
+    _hnswlib = None  # type: ignore
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/vector_index")
+VECTOR_INDEX_SAVE_EVERY = int(os.getenv("VECTOR_INDEX_SAVE_EVERY", "50"))
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+_INITIAL_CAPACITY = 1024
+
+
+class ResumeVectorIndex:
+    """
+    Nearest-neighbour index over normalized resume embeddings, keyed by resume id.
+
+    Uses an HNSW graph (inner-product space) when hnswlib is installed, otherwise keeps a
+    flat float32 matrix and does an exact scan. Either way the index lives in
+    ``VECTOR_INDEX_DIR`` and is tagged with the embedding model version, so a model change
+    starts it from scratch.
+
+    Each process holds its own copy. ``synced_through`` is the resume id up to which the
+    copy is known to hold every ready resume; callers top it up from the database above
+    that watermark. Saves and loads take a file lock, so workers sharing the directory
+    never read or write a mix of two saves.
+    """
+
+    def __init__(self, directory: str = VECTOR_INDEX_DIR):
+        self.directory = directory
+        self.backend = "hnsw" if _hnswlib is not None else "flat"
+        self.dim: Optional[int] = None
+        self.synced_through = 0
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._hnsw = None
+        self._ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._load()
+
+    # --- persistence ---
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    @property
+    def _hnsw_path(self) -> str:
+        return os.path.join(self.directory, "resumes.hnsw")
+
+    @property
+    def _ids_path(self) -> str:
+        return os.path.join(self.directory, "ids.npy")
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.directory, "vectors.npy")
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with self._file_lock(exclusive=False):
+            self._load_files()
+
+    def _load_files(self) -> None:
+        try:
+            with open(self._meta_path) as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if meta.get("model") != EMBEDDING_MODEL_VERSION or meta.get("backend") != self.backend:
+            return
+        try:
+            dim = int(meta["dim"])
+            ids = np.load(self._ids_path).astype(np.int64).tolist()
+            if self.backend == "hnsw":
+                index = _hnswlib.Index(space="ip", dim=dim)
+                index.load_index(self._hnsw_path, max_elements=max(len(ids), _INITIAL_CAPACITY))
+                index.set_ef(HNSW_EF_SEARCH)
+                self._hnsw = index
+            else:
+                self._matrix = np.load(self._matrix_path).astype(np.float32)
+        except Exception as e:
+            print("Vector index load failed, starting empty:", str(e))
+            self._hnsw = None
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            return
+        self.dim = dim
+        self._ids = ids
+        self._positions = {rid: pos for pos, rid in enumerate(ids)}
+        self.synced_through = int(meta.get("synced_through", 0))
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        if self.dim is None:
+            return
+        with self._file_lock(exclusive=True):
+            self._write_files()
+        self._unsaved = 0
+
+    def _write_files(self) -> None:
+        if self.backend == "hnsw":
+            tmp = self._hnsw_path + ".tmp"
+            self._hnsw.save_index(tmp)
+            os.replace(tmp, self._hnsw_path)
+        else:
+            _atomic_save_npy(self._matrix_path, self._matrix[: len(self._ids)])
+        _atomic_save_npy(self._ids_path, np.asarray(self._ids, dtype=np.int64))
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as fh:
+            meta = {"model": EMBEDDING_MODEL_VERSION, "backend": self.backend, "dim": self.dim}
+            json.dump({**meta, "synced_through": self.synced_through}, fh)
+        os.replace(tmp, self._meta_path)
+
+    # --- updates ---
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, resume_id: int) -> bool:
+        return resume_id in self._positions
+
+    def _init_storage(self, dim: int) -> None:
+        self.dim = dim
+        if self.backend == "hnsw":
+            index = _hnswlib.Index(space="ip", dim=dim)
+            index.init_index(max_elements=_INITIAL_CAPACITY, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+            index.set_ef(HNSW_EF_SEARCH)
+            self._hnsw = index
+        else:
+            self._matrix = np.zeros((_INITIAL_CAPACITY, dim), dtype=np.float32)
+
+    def add_many(self, resume_ids: Iterable[int], vectors: np.ndarray) -> None:
+        resume_ids = [int(i) for i in resume_ids]
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(resume_ids), -1)
+        if not resume_ids:
+            return
+        with self._lock:
+            if self.dim is None:
+                self._init_storage(vectors.shape[1])
+            new_ids = {rid for rid in resume_ids if rid not in self._positions}
+            needed = len(self._ids) + len(new_ids)
+            if self.backend == "hnsw":
+                # Re-adding an existing label overwrites its vector in place
+                if needed > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(max(needed, 2 * self._hnsw.get_max_elements()))
+                self._hnsw.add_items(vectors, np.asarray(resume_ids, dtype=np.int64))
+            elif needed > self._matrix.shape[0]:
+                grown = np.zeros((max(needed, 2 * self._matrix.shape[0]), self.dim), dtype=np.float32)
+                grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+                self._matrix = grown
+            for rid, vec in zip(resume_ids, vectors):
+                if rid not in self._positions:
+                    self._positions[rid] = len(self._ids)
+                    self._ids.append(rid)
+                if self.backend == "flat":
+                    self._matrix[self._positions[rid]] = vec
+            self._unsaved += len(resume_ids)
+            if self._unsaved >= VECTOR_INDEX_SAVE_EVERY:
+                self._save_locked()
+
+    def add(self, resume_id: int, vector: np.ndarray) -> None:
+        self.add_many([resume_id], np.asarray(vector)[None, :])
+
+    # --- queries ---
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Return up to ``k`` (resume_id, cosine similarity) pairs, best first."""
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or k <= 0:
+                return []
+            k = min(k, count)
+            query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+            if self.backend == "hnsw":
+                self._hnsw.set_ef(max(HNSW_EF_SEARCH, k))
+                labels, distances = self._hnsw.knn_query(query, k=k)
+                # hnswlib's "ip" distance is 1 - inner product
+                return [(int(label), float(1.0 - dist)) for label, dist in zip(labels[0], distances[0])]
+            sims = self._matrix[:count] @ query[0]
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            return [(self._ids[i], float(sims[i])) for i in top]
+
+
+def _atomic_save_npy(path: str, array: np.ndarray) -> None:
+    tmp = path + ".tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+@lru_cache(maxsize=1)
+def get_resume_index() -> ResumeVectorIndex:
+    return ResumeVectorIndex()
@@ -0,0 +1 @@
+"""Benchmark suite on a seeded synthetic corpus; see ``python -m benchmarks --help``."""
@@ -0,0 +1,192 @@
+"""
+Reproducible benchmarks on a seeded synthetic corpus.
+
+    python -m benchmarks run --sizes 100,1000,10000 --output bench.json
+    python -m benchmarks run --sizes 100 --baseline bench.json     # run, then compare
+    python -m benchmarks compare bench.json new.json --threshold 0.15
+    python -m benchmarks corpus --count 50 --output corpus/        # write the files out
+
+Every size runs in its own process against a fresh SQLite database, data directories
+and a local S3 stand-in under the work directory, with the configured encoder
+(EMBEDDING_BACKEND etc. are passed through). Each result has ``per_item_ms``; compare
+flags entries that got slower than the baseline by more than the threshold and exits 1.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+DEFAULT_SIZES = "100,1000,10000"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = "results.json"  # written by each size process; the app logs to stdout
+DEFAULT_THRESHOLD = 0.10
+
+
+def _size_env(work_dir: str, size: int) -> Dict[str, str]:
+    size_dir = os.path.join(work_dir, f"size_{size}")
+    os.makedirs(size_dir, exist_ok=True)
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(size_dir, 'bench.db')}",
+        "INGEST_QUEUE_PATH": os.path.join(size_dir, "ingest_queue.sqlite3"),
+        "VECTOR_INDEX_DIR": os.path.join(size_dir, "vector_index"),
+        "EMBEDDING_STORE_DIR": os.path.join(size_dir, "embedding_store"),
+        "SKILL_CACHE_DIR": os.path.join(work_dir, "skills"),  # shared: depends on the model only
+        "EMBED_DISK_CACHE_DIR": "",
+    }
+
+
+def _metadata(args) -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "seed": args.seed,
+        "sizes": args.sizes,
+        "doc_size": args.doc_size,
+        "repeat": args.repeat,
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "embedding_backend": os.getenv("EMBEDDING_BACKEND", "torch"),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run(args) -> int:
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="resume-bench-")
+    report = {"meta": _metadata(args), "results": {}}
+    try:
+        for size in args.sizes:
+            command = [sys.executable, "-m", "benchmarks", "_size", str(size)]
+            command += ["--seed", str(args.seed), "--doc-size", args.doc_size, "--repeat", str(args.repeat)]
+            size_dir = os.path.join(work_dir, f"size_{size}")
+            command += ["--ingest-timeout", str(args.ingest_timeout), "--work-dir", size_dir]
+            print(f"Running size {size} ...", file=sys.stderr)
+            result = subprocess.run(command, capture_output=True, text=True, env=_size_env(work_dir, size), cwd=REPO_ROOT)
+            if result.returncode != 0:
+                print(result.stderr, file=sys.stderr)
+                report["results"][f"error@{size}"] = {"error": "\n".join(result.stderr.strip().splitlines()[-1:])}
+                continue
+            with open(os.path.join(size_dir, RESULTS_FILE)) as fh:
+                report["results"].update(json.load(fh))
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            return compare_reports(json.load(fh), report, args.threshold)
+    return 0
+
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float) -> int:
+    """Print per-benchmark changes in per_item_ms; return 1 if any regressed beyond ``threshold``."""
+    regressions: List[str] = []
+    print(f"{'benchmark':<40} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name, {}).get("per_item_ms")
+        after = result.get("per_item_ms")
+        if not before or after is None:
+            continue
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<40} {before:>12.3f} {after:>12.3f} {change:>+8.1%}{flag}")
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print("Not in the current run:", ", ".join(missing))
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"No regressions above {threshold:.0%}")
+    return 0
+
+
+def write_corpus(args) -> int:
+    from benchmarks.corpus import generate_job_descriptions, generate_resumes
+
+    os.makedirs(args.output, exist_ok=True)
+    for doc in generate_resumes(args.count, seed=args.seed, size=args.doc_size):
+        with open(os.path.join(args.output, doc.filename), "wb") as fh:
+            fh.write(doc.data)
+    for i, text in enumerate(generate_job_descriptions(args.jds, seed=args.seed)):
+        with open(os.path.join(args.output, f"jd_{i:03d}.txt"), "w") as fh:
+            fh.write(text)
+    print(f"Wrote {args.count} resumes and {args.jds} job descriptions to {args.output}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def corpus_options(sub):
+        sub.add_argument("--seed", type=int, default=42)
+        sub.add_argument("--doc-size", choices=["small", "medium", "large"], default="medium")
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write a JSON report")
+    corpus_options(run_parser)
+    run_parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_SIZES)
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per parser benchmark (median kept)")
+    run_parser.add_argument("--ingest-timeout", type=float, default=3600)
+    run_parser.add_argument("--output", help="report path (default: stdout)")
+    run_parser.add_argument("--baseline", help="compare against this report after the run")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    run_parser.add_argument("--work-dir", help="keep databases and files here instead of a temp dir")
+    run_parser.add_argument("--keep", action="store_true", help="do not delete the temp work dir")
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    corpus_parser = commands.add_parser("corpus", help="write the synthetic corpus to a directory")
+    corpus_options(corpus_parser)
+    corpus_parser.add_argument("--count", type=int, default=100)
+    corpus_parser.add_argument("--jds", type=int, default=5)
+    corpus_parser.add_argument("--output", required=True)
+
+    size_parser = commands.add_parser("_size")  # internal: one size, in a prepared environment
+    corpus_options(size_parser)
+    size_parser.add_argument("size", type=int)
+    size_parser.add_argument("--repeat", type=int, default=3)
+    size_parser.add_argument("--ingest-timeout", type=float, default=3600)
+    size_parser.add_argument("--work-dir", required=True)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        sys.exit(run(args))
+    elif args.command == "compare":
+        with open(args.baseline) as fh, open(args.current) as gh:
+            sys.exit(compare_reports(json.load(fh), json.load(gh), args.threshold))
+    elif args.command == "corpus":
+        sys.exit(write_corpus(args))
+    else:
+        from benchmarks.suite import run_size
+
+        results = run_size(args.size, args.seed, args.doc_size, args.repeat, args.ingest_timeout, args.work_dir)
+        with open(os.path.join(args.work_dir, RESULTS_FILE), "w") as fh:
+            json.dump(results, fh)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Seeded synthetic resumes and job descriptions.
+
+The same seed always yields the same texts. Skills are drawn from nlp.DEFAULT_SKILLS,
+so extraction and matching see a realistic hit density. Resumes are rendered as TXT,
+DOCX or PDF, rotating through the requested formats.
+"""
+import io
+import random
+import textwrap
+from typing import List, NamedTuple, Sequence
+
+from app.utils.nlp import DEFAULT_SKILLS
+
+FORMATS = ("txt", "docx", "pdf")
+CONTENT_TYPES = {
+    "txt": "text/plain",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+# Experience entries per resume for each document size
+DOC_SIZES = {"small": (1, 2), "medium": (3, 5), "large": (8, 12)}
+
+FIRST_NAMES = [
+    "Aarav", "Maya", "Liam", "Sofia", "Noah", "Priya", "Ethan", "Chloe", "Ravi", "Emma",
+    "Lucas", "Ananya", "Mateo", "Hannah", "Omar", "Isabella", "Kenji", "Zara", "Daniel", "Leila",
+]
+LAST_NAMES = [
+    "Sharma", "Johnson", "Garcia", "Chen", "Okafor", "Patel", "Müller", "Rossi", "Kim", "Nguyen",
+    "Silva", "Kowalski", "Haddad", "Brown", "Ivanova", "Tanaka", "Singh", "Lopez", "Clark", "Ahmed",
+]
+COMPANIES = [
+    "Northwind Analytics", "Bluefin Systems", "Acme Retail", "Helios Health", "Quantix Labs",
+    "Orbital Logistics", "Greenleaf Bank", "Nimbus Cloud", "Vertex Media", "Summit Insurance",
+]
+TITLES = [
+    "Software Engineer", "Senior Backend Engineer", "Data Engineer", "Machine Learning Engineer",
+    "DevOps Engineer", "Full Stack Developer", "Data Scientist", "Platform Engineer",
+]
+SKILLS = sorted(DEFAULT_SKILLS)  # sets iterate in hash order; sorted for reproducibility
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Maintained", "Shipped"]
+OBJECTS = [
+    "a customer-facing API", "the billing pipeline", "an internal analytics dashboard",
+    "a recommendation service", "the CI/CD workflow", "a real-time event processor",
+    "the data warehouse", "a document search feature", "the mobile backend", "a fraud detection model",
+]
+OUTCOMES = [
+    "reducing latency by {n}%", "cutting infrastructure cost by {n}%", "serving {n}k daily users",
+    "improving test coverage to {n}%", "shortening release cycles by {n}%", "handling {n}M events per day",
+]
+
+
+class SyntheticDocument(NamedTuple):
+    filename: str
+    content_type: str
+    data: bytes
+    text: str
+
+
+def make_resume_text(rng: random.Random, index: int, size: str = "medium") -> str:
+    skills = rng.sample(SKILLS, rng.randint(6, 14))
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    years = rng.randint(1, 15)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{index}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "Summary",
+        f"{rng.choice(TITLES)} with {years} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "Experience",
+    ]
+    low, high = DOC_SIZES[size]
+    for _ in range(rng.randint(low, high)):
+        lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} ({rng.randint(2008, 2024)})")
+        for _ in range(rng.randint(2, 4)):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 90))
+            used = ", ".join(rng.sample(skills, 2))
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {used}, {outcome}.")
+        lines.append("")
+    lines += ["Skills", ", ".join(skills), "", "Education", f"B.Sc. Computer Science, {rng.choice(COMPANIES)} University"]
+    return "\n".join(lines)
+
+
+def make_jd_text(rng: random.Random) -> str:
+    skills = rng.sample(SKILLS, rng.randint(5, 10))
+    title = rng.choice(TITLES)
+    return "\n".join(
+        [
+            f"{title} at {rng.choice(COMPANIES)}",
+            "",
+            f"We are looking for a {title.lower()} with {rng.randint(2, 8)} years of experience.",
+            f"You will work on {rng.choice(OBJECTS)} and {rng.choice(OBJECTS)}.",
+            "Requirements:",
+            *[f"- Hands-on experience with {skill}" for skill in skills],
+            "Nice to have: " + ", ".join(rng.sample(SKILLS, 3)),
+        ]
+    )
+
+
+def render_txt(text: str) -> bytes:
+    return text.encode("utf-8")
+
+
+def render_docx(text: str) -> bytes:
+    from docx import Document
+
+    document = Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _pdf_escape(line: str) -> str:
+    line = line.encode("latin-1", errors="replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(text: str, lines_per_page: int = 60) -> bytes:
+    """Minimal text-only PDF (Helvetica, A4); enough for pdfplumber, no extra dependency."""
+    lines = [wrapped for line in text.split("\n") for wrapped in (textwrap.wrap(line, 95) or [""])]
+    pages = [lines[i : i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 800 Td\n" + "".join(f"({_pdf_escape(l)}) Tj T*\n" for l in page_lines) + "ET"
+        data = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_refs)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+RENDERERS = {"txt": render_txt, "docx": render_docx, "pdf": render_pdf}
+
+
+def generate_resumes(
+    count: int, seed: int = 42, formats: Sequence[str] = FORMATS, size: str = "medium"
+) -> List[SyntheticDocument]:
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        text = make_resume_text(rng, i, size)
+        documents.append(SyntheticDocument(f"resume_{i:05d}.{fmt}", CONTENT_TYPES[fmt], RENDERERS[fmt](text), text))
+    return documents
+
+
+def generate_job_descriptions(count: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed + 1)  # independent of the resume stream
+    return [make_jd_text(rng) for _ in range(count)]
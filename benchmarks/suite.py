@@ -0,0 +1,164 @@
+"""
+Benchmarks for one corpus size, run in a fresh process by ``python -m benchmarks run``.
+
+The environment (DATABASE_URL pointing at SQLite, data directories under the work
+directory) is set by the parent before this module imports anything from ``app``.
+"""
+import os
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.corpus import FORMATS, generate_job_descriptions, generate_resumes
+
+INGEST_POLL_SECONDS = 0.2
+
+
+class LocalS3:
+    """Stand-in for the boto3 S3 client: ``upload_fileobj`` writes under a local directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def upload_fileobj(self, file_obj, bucket: str, key: str, ExtraArgs: Optional[Dict] = None) -> None:
+        path = os.path.join(self.root, bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(file_obj.read())
+
+
+def _summary(items: int, seconds: float, **extra) -> Dict:
+    return {
+        "items": items,
+        "seconds": round(seconds, 4),
+        "per_item_ms": round(1000 * seconds / items, 4) if items else None,
+        "items_per_sec": round(items / seconds, 2) if seconds else None,
+        **extra,
+    }
+
+
+def _median_run(fn: Callable[[], int], repeat: int) -> Dict:
+    """Run ``fn`` (which returns the number of items it processed) ``repeat`` times; keep the median."""
+    timings, items = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = fn()
+        timings.append(time.perf_counter() - started)
+    return _summary(items, statistics.median(timings), repeat=repeat)
+
+
+def _percentile_ms(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(1000 * ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 3)
+
+
+def run_size(size: int, seed: int, doc_size: str, repeat: int, ingest_timeout: float, work_dir: str) -> Dict:
+    from app.utils import s3_client
+    from app.utils.embeddings import embed_texts
+    from app.utils.nlp import extract_fields
+    from app.utils.parsers import extract_text
+    from app.utils.scoring import score_resume_against_jd
+    from app.utils.skill_vectors import get_skill_table
+
+    s3_client.s3 = LocalS3(os.path.join(work_dir, "s3"))
+    s3_client.BUCKET = "benchmark"
+
+    resumes = generate_resumes(size, seed=seed, size=doc_size)
+    jd_text = generate_job_descriptions(1, seed=seed)[0]
+    embed_texts(["warm up the encoder"])  # model load is not part of any benchmark
+    get_skill_table()
+
+    results: Dict[str, Dict] = {}
+    for fmt in FORMATS:
+        docs = [doc for doc in resumes if doc.filename.endswith("." + fmt)]
+        if docs:
+            results[f"extract_text[{fmt}]@{size}"] = _median_run(
+                lambda docs=docs: len([extract_text(d.filename, d.content_type, d.data) for d in docs]), repeat
+            )
+    texts = [doc.text for doc in resumes]
+    results[f"extract_fields@{size}"] = _median_run(lambda: len([extract_fields(t) for t in texts]), repeat)
+    # Cold path: every call embeds, extracts skills and splits sentences itself
+    results[f"score_resume_against_jd@{size}"] = _median_run(
+        lambda: len([score_resume_against_jd(t, jd_text) for t in texts]), 1
+    )
+
+    results.update(_endpoint_benchmarks(size, resumes, jd_text, ingest_timeout))
+    return results
+
+
+def _endpoint_benchmarks(size: int, resumes, jd_text: str, ingest_timeout: float) -> Dict[str, Dict]:
+    try:
+        from fastapi.testclient import TestClient
+    except Exception as e:  # TestClient needs httpx
+        return {f"{name}@{size}": {"skipped": f"TestClient unavailable: {e}"} for name in ("upload_resume", "results_bulk")}
+    from sqlalchemy import func
+
+    from app.models.database import SessionLocal
+    from app.models.entities import JobDescription, Resume
+    from app.routes.auth import hr_required
+    from app.utils.ingest import STATUS_FAILED, STATUS_READY
+    from main import app
+
+    app.dependency_overrides[hr_required] = lambda: {"role": "hr"}
+    results: Dict[str, Dict] = {}
+    with TestClient(app) as client:
+        # Tables, workers and models come up in the background; none of that is measured
+        deadline = time.perf_counter() + ingest_timeout
+        while client.get("/ready").status_code != 200:
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"App not ready: {client.get('/ready').json()}")
+            time.sleep(INGEST_POLL_SECONDS)
+
+        # /upload_resume: request latency, then wall time until the ingest worker has every resume
+        latencies = []
+        started = time.perf_counter()
+        for doc in resumes:
+            request_started = time.perf_counter()
+            response = client.post("/upload_resume", files={"file": (doc.filename, doc.data, doc.content_type)})
+            latencies.append(time.perf_counter() - request_started)
+            response.raise_for_status()
+        accepted = time.perf_counter() - started
+
+        counts: Dict[str, int] = {}
+        while time.perf_counter() - started < ingest_timeout:
+            db = SessionLocal()
+            try:
+                counts = dict(db.query(Resume.status, func.count()).group_by(Resume.status).all())
+            finally:
+                db.close()
+            if counts.get(STATUS_READY, 0) + counts.get(STATUS_FAILED, 0) >= len(resumes):
+                break
+            time.sleep(INGEST_POLL_SECONDS)
+        ingested = time.perf_counter() - started
+        results[f"upload_resume@{size}"] = _summary(
+            len(resumes),
+            ingested,
+            request_p50_ms=_percentile_ms(latencies, 50),
+            request_p95_ms=_percentile_ms(latencies, 95),
+            accept_seconds=round(accepted, 4),
+            ready=counts.get(STATUS_READY, 0),
+            failed=counts.get(STATUS_FAILED, 0),
+        )
+
+        db = SessionLocal()
+        try:
+            jd = JobDescription(title="Benchmark JD", description_text=jd_text)
+            db.add(jd)
+            db.commit()
+            jd_id = jd.id
+        finally:
+            db.close()
+
+        # cold: every resume is scored (force); warm: stored matches are reused
+        for label, force in (("cold", True), ("warm", False)):
+            started = time.perf_counter()
+            response = client.get("/results/bulk", params={"job_description_id": jd_id, "force": force})
+            elapsed = time.perf_counter() - started
+            response.raise_for_status()
+            body = response.json()
+            results[f"results_bulk[{label}]@{size}"] = _summary(
+                body["total_resumes_processed"], elapsed, rescored=body["resumes_rescored"]
+            )
+    return results
@@ -0,0 +1,180 @@
+"""
+Export the sentence-transformers encoder to ONNX for EMBEDDING_BACKEND=onnx.
+
+    python export_onnx_model.py                 # writes ONNX_MODEL_DIR (fp32 and int8 graphs)
+    python export_onnx_model.py --check         # parity of both graphs against PyTorch
+    python export_onnx_model.py --benchmark     # latency and peak RSS per backend
+
+Run the app with EMBEDDING_BACKEND=onnx (and ONNX_QUANTIZED=true for the int8 graph).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# fp32 ONNX must match PyTorch to float noise; int8 only needs to rank the same way
+FP32_MIN_COSINE = 0.9999
+INT8_MIN_COSINE = 0.98
+
+SAMPLE_TEXTS = [
+    "Senior Python developer with 6 years of experience building FastAPI services.",
+    "Led a team of five engineers migrating a monolith to Kubernetes on AWS.",
+    "Skills: SQL, PostgreSQL, Docker, Terraform, CI/CD, machine learning.",
+    "Looking for a data engineer comfortable with Spark, Airflow and dbt.",
+    "Built NLP pipelines with spaCy and sentence-transformers for document search.",
+    "Responsible for React front-end, TypeScript, and accessibility reviews.",
+    "Hi",
+    "Managed budgets and stakeholder communication across three product lines. " * 20,
+]
+
+
+def export(output_dir: str) -> None:
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    from app.utils.embeddings import EMBEDDING_MODEL_NAME
+
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+    pooling = model[1]
+    if not pooling.pooling_mode_mean_tokens or len(model) != 3:
+        raise SystemExit("Only Transformer -> mean pooling -> Normalize models are supported")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    torch.onnx.export(
+        _LastHiddenState(transformer),
+        tuple(sample[name] for name in names),
+        fp32_path,
+        input_names=names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={name: {0: "batch", 1: "tokens"} for name in names + ["last_hidden_state"]},
+        opset_version=14,
+    )
+    quantize_dynamic(fp32_path, os.path.join(output_dir, "model_quantized.onnx"), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)  # tokenizer.json is what OnnxEncoder reads
+    with open(os.path.join(output_dir, "encoder_config.json"), "w") as f:
+        json.dump(
+            {
+                "model_name": EMBEDDING_MODEL_NAME,
+                "max_seq_length": model.max_seq_length,
+                "dimension": model.get_sentence_embedding_dimension(),
+                "pad_token": tokenizer.pad_token,
+                "pad_token_id": tokenizer.pad_token_id,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Exported {EMBEDDING_MODEL_NAME} to {output_dir}")
+
+
+def check(output_dir: str) -> bool:
+    import numpy as np
+
+    from app.utils.embeddings import OnnxEncoder, TorchEncoder
+
+    reference = TorchEncoder().encode(SAMPLE_TEXTS, batch_size=4)
+    ok = True
+    for quantized, min_cosine in ((False, FP32_MIN_COSINE), (True, INT8_MIN_COSINE)):
+        vectors = OnnxEncoder(output_dir, quantized=quantized).encode(SAMPLE_TEXTS, batch_size=4)
+        cosine = np.sum(reference * vectors, axis=1)
+        max_abs = float(np.abs(reference - vectors).max())
+        passed = bool(cosine.min() >= min_cosine)
+        ok = ok and passed
+        label = "int8" if quantized else "fp32"
+        status = "ok" if passed else "FAIL"
+        print(f"{label}: min cosine {cosine.min():.6f} (>= {min_cosine}), max abs diff {max_abs:.2e} -> {status}")
+    return ok
+
+
+def measure(backend: str, quantized: bool, batch_size: int, rounds: int) -> dict:
+    """Runs in a fresh process so load time and peak RSS belong to one backend only."""
+    os.environ["EMBEDDING_BACKEND"] = backend
+    os.environ["ONNX_QUANTIZED"] = "true" if quantized else "false"
+    from app.utils.embeddings import get_encoder
+
+    started = time.perf_counter()
+    encoder = get_encoder()
+    load_seconds = time.perf_counter() - started
+
+    texts = (SAMPLE_TEXTS * (batch_size // len(SAMPLE_TEXTS) + 1))[:batch_size]
+    encoder.encode(texts[:1], batch_size=1)  # warm-up
+    single, batched = [], []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        encoder.encode(texts[:1], batch_size=1)
+        single.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        encoder.encode(texts, batch_size=batch_size)
+        batched.append(time.perf_counter() - started)
+    single.sort()
+    batched.sort()
+    return {
+        "backend": backend + (" int8" if quantized else ""),
+        "load_seconds": round(load_seconds, 2),
+        "single_ms_p50": round(1000 * single[len(single) // 2], 2),
+        f"batch{batch_size}_ms_p50": round(1000 * batched[len(batched) // 2], 2),
+        "texts_per_second": round(batch_size / batched[len(batched) // 2], 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # KiB on Linux
+    }
+
+
+def benchmark(output_dir: str, batch_size: int, rounds: int) -> None:
+    env = {**os.environ, "ONNX_MODEL_DIR": output_dir}
+    for backend, quantized in (("torch", False), ("onnx", False), ("onnx", True)):
+        command = [sys.executable, __file__, "--measure", backend]
+        command += ["--batch-size", str(batch_size), "--rounds", str(rounds)]
+        if quantized:
+            command.append("--quantized")
+        result = subprocess.run(command, capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            print(f"{backend}{' int8' if quantized else ''}: failed\n{result.stderr}")
+            continue
+        print(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="model directory (default: ONNX_MODEL_DIR)")
+    parser.add_argument("--check", action="store_true", help="compare the exported graphs with PyTorch")
+    parser.add_argument("--benchmark", action="store_true", help="latency and peak RSS of each backend")
+    parser.add_argument("--measure", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--quantized", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.measure:
+        # Before anything imports app.utils.embeddings, which reads the backend settings
+        print(json.dumps(measure(args.measure, args.quantized, args.batch_size, args.rounds)))
+        return
+
+    from app.utils.embeddings import ONNX_MODEL_DIR
+
+    args.output = args.output or ONNX_MODEL_DIR
+    if args.check:
+        sys.exit(0 if check(args.output) else 1)
+    elif args.benchmark:
+        benchmark(args.output, args.batch_size, args.rounds)
+    else:
+        export(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Pre-fork serving with model weights shared across workers:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The master imports the app once with PRELOAD_MODELS=true, loading spaCy and the torch
+encoder, then forks WEB_CONCURRENCY Uvicorn workers that share those pages copy-on-write.
+Each worker runs the rest of the startup phases itself (see app.utils.startup). Plain
+``uvicorn --workers`` spawns fresh interpreters instead, so every worker loads its own copy.
+"""
+import gc
+import os
+
+os.environ.setdefault("PRELOAD_MODELS", "true")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach: a collection in a
+    # worker would otherwise write to every tracked object's header and un-share its page
+    gc.freeze()
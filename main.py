@@ -1,11 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.models.database import Base, engine
+from app.models.database import engine
 from app.routes.auth import router as auth_router
+from app.routes.health import router as health_router
 from app.routes.resumes import router as resumes_router
 from app.routes.job_descriptions import router as jd_router
 from app.routes.results import router as results_router
+from app.routes.match_jobs import router as match_jobs_router
+from app.routes.metrics import record_request_metrics, router as metrics_router
+from app.utils.concurrency import InferenceTimeout, shutdown_executors
+from app.utils.ingest import get_ingest_worker
+from app.utils.match_jobs import get_match_job_runner
+from app.utils.metrics import METRICS_ENABLED, instrument_engine
+from app.utils.parsers import get_parse_pool
+from app.utils.startup import PRELOAD_MODELS, STARTUP_PHASES, get_startup, preload_models
+from app.utils.vector_index import get_resume_index
 
 
 def create_app() -> FastAPI:
@@ -19,17 +30,43 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    Base.metadata.create_all(bind=engine)
+    if METRICS_ENABLED:
+        app.middleware("http")(record_request_metrics)
+        instrument_engine(engine)
 
+    app.include_router(health_router, tags=["health"])
+    app.include_router(metrics_router, tags=["health"])
     app.include_router(auth_router, prefix="/auth", tags=["auth"])
     app.include_router(resumes_router, tags=["resumes"])
     app.include_router(jd_router, tags=["job_descriptions"])
     app.include_router(results_router, tags=["results"])
+    app.include_router(match_jobs_router, tags=["results"])
+
+    @app.exception_handler(InferenceTimeout)
+    async def inference_timeout_handler(request: Request, exc: InferenceTimeout):
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    @app.on_event("startup")
+    def start_background_work():
+        # Schema upgrade, the ingest/match-job workers and the model warm-up run in the
+        # background, after the schema is in place (see app.utils.startup)
+        get_startup().start(STARTUP_PHASES)
+
+    @app.on_event("shutdown")
+    def stop_background_work():
+        get_ingest_worker().stop()
+        get_match_job_runner().stop()
+        get_parse_pool().shutdown(wait=False, cancel_futures=True)
+        shutdown_executors()
+        get_resume_index().save()
 
     return app
 
 
-app = create_app() 
+app = create_app()
+if PRELOAD_MODELS:
+    preload_models()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Resume Screener application!"}
\ No newline at end of file
@@ -0,0 +1,7 @@
+from app.models.database import engine
+from app.models.migrations import upgrade_schema
+
+print("Using DB URL:", engine.url)
+print("Upgrading schema in place (existing data is kept)...")
+upgrade_schema(engine)
+print("✅ Done!")